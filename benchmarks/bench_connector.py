@@ -0,0 +1,153 @@
+"""
+Throughput benchmark of DYSManager against the local fake DYS server of tests/fake_dys.py.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_connector --documents 2000 --payload-size 65536 --workers 16 --latency 0.002
+
+For every scenario it reports requests/sec, p50/p99 request latency, failed HTTP requests ("errors"), failed
+operations after retries ("failed") and the peak Python memory allocated while the scenario ran. The server runs
+in a child process, so its allocations are not included.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+from dys_connector.concurrency import bounded_map
+from dys_connector.dto import UploadDocumentDTO
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.metrics import MetricsHook
+from tests.fake_dys import ROOT_CID, SEED_FOLDER_CID, start_in_process
+
+
+class LatencyRecorder(MetricsHook):
+    """
+    Keeps every request latency so exact percentiles can be reported.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, method, status_code, latency, bytes_out, bytes_in):
+        with self._lock:
+            self.latencies.append(latency)
+            if status_code is None or status_code >= 400:
+                self.errors += 1
+
+    def reset(self):
+        with self._lock:
+            self.latencies = []
+            self.errors = 0
+
+
+def percentile(values: list, quantile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+def run_scenario(name: str, recorder: LatencyRecorder, scenario):
+    """
+    :param scenario: Callable returning the number of operations that failed
+    """
+    recorder.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    failed = scenario()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies = recorder.latencies
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": recorder.errors,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_memory_kb": peak // 1024,
+    }
+
+
+def drain(results) -> int:
+    """
+    Consume bulk results.
+    :return: Number of failed items. Failures are expected with --error-rate, so they are counted, not raised.
+    """
+    return sum(1 for res in results if res.error is not None)
+
+
+def list_all(manager: DYSManager, folder_cid: str, page_size: int) -> int:
+    try:
+        for _ in manager.iter_dir_structure(folder_cid, page_size=page_size):
+            pass
+    except Exception:
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dys-connector against a local fake DYS")
+    parser.add_argument("--documents", type=int, default=500, help="Documents per scenario")
+    parser.add_argument("--payload-size", type=int, default=16 * 1024, help="Document size in bytes")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel requests of bulk scenarios")
+    parser.add_argument("--page-size", type=int, default=1000, help="Page size of the listing scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added by the server to each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 503")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    process, base_url = start_in_process(latency=args.latency, error_rate=args.error_rate,
+                                         seed_documents=args.documents, payload_size=args.payload_size)
+    recorder = LatencyRecorder()
+    manager = DYSManager(base_url, "token", pool_maxsize=args.workers, metrics=recorder)
+    seeded = [f"{SEED_FOLDER_CID}-doc-{i}" for i in range(args.documents)]
+    payload = (b"<html><body>" + b"x" * args.payload_size)[:args.payload_size]
+    upload_folder = manager.post_folder(ROOT_CID, "bench-upload")
+
+    class NullSink:
+        def write(self, data):
+            return len(data)
+
+    scenarios = [
+        ("upload", lambda: drain(manager.post_contents(
+            ((upload_folder, UploadDocumentDTO(f"doc-{i}.html"), payload) for i in range(args.documents)),
+            max_workers=args.workers))),
+        ("list_directory", lambda: list_all(manager, SEED_FOLDER_CID, args.page_size)),
+        ("metadata_read", lambda: drain(bounded_map(manager.get_doc_metadata, seeded, max_workers=args.workers))),
+        ("metadata_update", lambda: drain(bounded_map(
+            lambda cid: manager.update_metadata(cid, {"bench": "1"}, "doc_type"), seeded,
+            max_workers=args.workers))),
+        ("content_download", lambda: drain(bounded_map(
+            lambda cid: manager.download_document(cid, NullSink()), seeded, max_workers=args.workers))),
+        ("clear_directory", lambda: len(manager.clear_directory_report(upload_folder,
+                                                                       max_workers=args.workers).failed)),
+    ]
+    try:
+        results = [run_scenario(name, recorder, scenario) for name, scenario in scenarios]
+    finally:
+        manager.close()
+        process.terminate()
+
+    columns = ["scenario", "requests", "errors", "failed", "seconds", "requests_per_sec", "p50_ms", "p99_ms",
+               "peak_memory_kb"]
+    print(" ".join(f"{column:>16}" for column in columns))
+    for result in results:
+        print(" ".join(f"{result[column]:>16}" for column in columns))
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump({"args": vars(args), "results": results}, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
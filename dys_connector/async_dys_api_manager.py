@@ -0,0 +1,343 @@
+import asyncio
+import json
+import logging
+from typing import Callable
+
+import httpx
+
+import dys_connector.json_decoder as json_decoder
+from dys_connector.dto import VerificationType
+from dys_connector.dys_api_manager import (DEFAULT_HEADER, DEFAULT_POOL_SIZE, DEFAULT_CONNECT_TIMEOUT,
+                                           DEFAULT_READ_TIMEOUT, ENDPOINTS, Container, DYSManager, _request_log)
+
+DEFAULT_CONCURRENCY = 100
+
+
+class AsyncDYSManager:
+    """
+    An asyncio client to interact with Logo DYS(Doküman Yönetim Sitemi) API.
+    Requires the optional ``httpx`` dependency: ``pip install dys-connector[async]``
+
+    Attributes
+    ----------
+    dys_base_url : str
+        Dys Endpoint e.g.: "https://dys.logo.cloud"
+    TOKEN: str
+        Logo IDM token for Authentication & Authorization
+    client: httpx.AsyncClient
+        Client whose connection pool is shared by every request of the manager
+    semaphore: asyncio.Semaphore
+        Bounds the number of in-flight requests
+
+    The manager should be closed to release pooled connections:
+
+        async with AsyncDYSManager(dys_base_url, idm_token) as manager:
+            await manager.check_state()
+    """
+
+    def __init__(self, dys_base_url, idm_token, corid=None, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 pool_maxsize: int = DEFAULT_POOL_SIZE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, json_loads: Callable = None):
+        """
+        :param dys_base_url: Dys Endpoint e.g.: "https://dys.logo.cloud"
+        :param idm_token: Logo IDM token
+        :param corid: (Optional) Correlation id sent with every request
+        :param max_concurrency: Maximum number of requests in flight at the same time
+        :param pool_maxsize: Maximum number of pooled connections kept alive
+        :param connect_timeout: Seconds to wait for a connection to DYS. None waits forever.
+        :param read_timeout: Seconds to wait for DYS to send a response. None waits forever.
+        :param json_loads: (Optional) Callable decoding JSON bytes. Defaults to orjson when installed, json otherwise.
+        """
+        if None in (dys_base_url, idm_token):
+            raise ValueError("DYS Base Url or IDM Token cannot be None!")
+        if dys_base_url[-1] == '/':
+            dys_base_url = dys_base_url[:-1]
+        self.dys_base_url = dys_base_url
+        self.TOKEN = idm_token
+        self.HEADERS = {
+            "Authorization": "Bearer " + self.TOKEN,
+        }
+        self.corid = corid
+        self.json_loads = json_loads or json_decoder.loads
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max(pool_maxsize, max_concurrency),
+                                max_keepalive_connections=pool_maxsize),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def close(self):
+        """
+        Close pooled connections of the manager. The manager must not be used afterwards.
+        """
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def get_url(self, task: str):
+        """
+        Generates the domain appropriate url
+        :param task: task name
+        :return: string. Returns the endpoint for a specific task
+        :exception: KeyError if task not exist
+        """
+        return self.dys_base_url + ENDPOINTS[task]
+
+    async def make_dys_request(self, method: str, url: str, headers=None, **kwargs):
+        """
+        General DYS requests with basic error handling
+        :param method: Request method. Ex: "GET", "POST", "PUT"
+        :param url: Request url
+        :param headers: (optional) Request headers
+        :param kwargs: (optional) Optional parameters of httpx request method. Ex: content, data, files etc.
+        :return: :class:`httpx.Response` object
+        """
+        if not headers:
+            headers = self.HEADERS.copy()
+        if self.corid:
+            headers.update({'corid': self.corid})
+
+        if logging.root.isEnabledFor(logging.INFO):
+            logging.info(_request_log(method, url, None, self.corid, kwargs))
+
+        async with self.semaphore:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        DYSManager.check_dys_exception(response)
+        return response
+
+    async def check_state(self):
+        """
+        Check for DYS Application State
+        :return: state. FINE, WARNING or FAILURE. If request is not successful, returns response text.
+        """
+        url = self.get_url("STATE")
+        res = await self.make_dys_request("GET", url=url, headers={})
+        if res.status_code not in [200, 202]:
+            return res.text
+        status_dict = self.json_loads(res.content)
+        if "state" in status_dict.keys():
+            return status_dict["state"]
+        return res
+
+    async def post_folder(self, parent_folder_cid: str, folder_name: str):
+        """
+        Upload folders to DYS
+        :param parent_folder_cid: Parent folder cid that document will be uploaded
+        :param folder_name: Parent folder name of folders in folders list
+        :return: New folder's cid
+        """
+        url = self.get_url("UPLOAD_FOLDER") + "?parentFolderCid=" + parent_folder_cid + "&folderName=" + folder_name
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = f"{DEFAULT_HEADER};charset=UTF-8"
+        response = await self.make_dys_request("POST", url, headers=headers)
+        value_parent = self.json_loads(response.content)
+        return value_parent["cid"]
+
+    async def post_content(self, parent_folder_cid: str, payload: dict, files: list):
+        """
+        Uploads document to DYS
+        :param parent_folder_cid: Parent folder cid that document will be uploaded
+        :param payload: A dict that contains "uploadDocumentDTO". Ex: {"uploadDocumentDTO": ''}
+        :param files: File list. Ex: [("file", (doc["filename"], doc["file"], "text/html"))]
+        :return: :class:`httpx.Response` object
+        """
+        url = self.get_url("UPLOAD_DOCUMENT")
+        params = {
+            "parentFolderCid": parent_folder_cid,
+            "mimeType": "text/html"
+        }
+        response = await self.make_dys_request("POST", url, data=payload, files=files, params=params)
+        return response
+
+    async def get_dir_structure(self, folder_cid: str, cont_group: Container = Container.DIRECTORY, _from: int = 0,
+                                _to: int = 10000):
+        """
+        Get content list of a directory.
+        :param folder_cid: Directory Cid
+        :param _from: (default:0) Ignore files till from parameter
+        :param _to: (default:10000) File limit. DYS supports maximum 10000 for structure request.
+        :param cont_group: Container type defaults to SPACE
+        :return: List of Dicts. Each dict refers the basic information of a document.
+        """
+        url = self.get_url(
+            "DIR_STRUCTURE") + f"?folderCid={folder_cid}&from={_from}&size={_to}&containerType={cont_group.name}"
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = DEFAULT_HEADER
+        res = await self.make_dys_request("GET", url, headers=headers)
+        return self.json_loads(res.content)
+
+    async def get_doc_metadata(self, doc_cid: str):
+        """
+        Get Metadata of a Document
+        :param doc_cid: Document Cid
+        :return: Returns a dict that contains document metadata
+        """
+        url = self.get_url("GET_DOC_META").format(cid=doc_cid)
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = DEFAULT_HEADER
+        res = self.json_loads((await self.make_dys_request("GET", url, headers=headers)).content)
+        return res["varValues"]
+
+    async def update_metadata(self, doc_cid: str, metadata: dict, doc_type_id: str):
+        """
+        Update a document metadata
+        :param doc_cid: Document Cid
+        :param metadata: New metadata dict of the document
+        :param doc_type_id: Document type id that refers to metadata group.
+        :return: :class:`httpx.Response` object
+        """
+        url = self.get_url("UPDATE_DOC_META").format(cid=doc_cid)
+        pay_dict = {"documentTypeIds": [], "tagIds": [doc_type_id], "varValues": metadata}
+        payload = json.dumps(pay_dict).encode("utf-8")
+        headers = {
+            "Content-Type": f"{DEFAULT_HEADER};charset=UTF-8",
+            "Authorization": "Bearer " + self.TOKEN,
+        }
+        return await self.make_dys_request("PUT", url, headers=headers, content=payload)
+
+    async def get_document_without_content(self, doc_cid: str):
+        """
+        Get document information and details from DYS. (Not Document Content!)
+        :param doc_cid: Document Cid
+        :return: dict: Document details
+        """
+        url = self.get_url("GET_DOC_INFO").format(cid=doc_cid)
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = DEFAULT_HEADER
+        res = await self.make_dys_request("GET", url, headers=headers)
+        return self.json_loads(res.content)
+
+    async def get_external_share(self, doc_cid: str, hide_name: bool = True) -> list:
+        """
+        Get existing external share url for a document.
+        :param doc_cid: Document Cid
+        :param hide_name: bool: Hide document name on external share.
+        :return: External share url list
+        """
+        url = self.get_url("EXTERNAL_SHARE").format(cid=doc_cid)
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = f"{DEFAULT_HEADER};charset=UTF-8"
+        response = await self.make_dys_request("GET", url, headers=headers)
+        value = self.json_loads(response.content)
+        return list(map(lambda link: link + "&hideName={}".format(hide_name), (item['shareLink'] for item in value)))
+
+    async def generate_external_share(self, doc_cid: str, hide_name: bool = True,
+                                      role_id_list: list = [],
+                                      disposable: bool = False,
+                                      download_disabled: bool = False,
+                                      verification_type=VerificationType.NONE
+                                      ):
+        """
+        Generate external share url for a document.
+        :param doc_cid: Document Cid
+        :param hide_name: bool: Hide document name on external share.
+        :param role_id_list:
+        :param disposable:
+        :param download_disabled:
+        :param verification_type:
+        :return: External share url string
+        """
+        url = self.get_url("EXTERNAL_SHARE").format(cid=doc_cid)
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = f"{DEFAULT_HEADER};charset=UTF-8"
+        payload = {
+            "authorizationRoleList": role_id_list,
+            "cancelled": "false",
+            "disposable": str(disposable).lower(),
+            "downloadDisabled": str(download_disabled).lower(),
+            "ignoreKafka": "true",
+            "passwordProtected": "false",
+            "uploadEnabled": "false",
+            "verificationType": verification_type.value[0]
+        }
+        if len(role_id_list) == 0:
+            del payload['authorizationRoleList']
+        if verification_type is VerificationType.IDM:
+            payload.update({"idmExternalShare": "true"})
+        payload = json.dumps(payload)
+        response = await self.make_dys_request("POST", url, headers=headers, content=payload)
+        value = self.json_loads(response.content)
+        external_url = value["externalShareMailLinkMap"][
+                           next(iter(value["externalShareMailLinkMap"]))] + "&hideName={}".format(hide_name)
+        return external_url
+
+    async def generate_link_external_share(self, doc_cid: str, hide_name: bool = True):
+        """
+        Generate all public external share url for a document.
+        :param doc_cid: Document Cid
+        :param hide_name: bool: Hide document name on external share.
+        :return: External share url string
+        """
+        url = self.get_url("LINK_EXTERNAL_SHARE").format(cid=doc_cid)
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = f"{DEFAULT_HEADER};charset=UTF-8"
+        response = await self.make_dys_request("POST", url, headers=headers)
+        value = self.json_loads(response.content)
+        external_url = value["externalShareMailLinkMap"][
+                           next(iter(value["externalShareMailLinkMap"]))] + "&hideName={}".format(hide_name)
+        return external_url
+
+    async def get_document_content(self, doc_cid: str):
+        """
+        Get content of a document from DYS.
+        :param doc_cid: Document Cid
+        :return: :class:`httpx.Response` object
+        """
+        url = self.get_url("DOC_CONTENT").format(cid=doc_cid)
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = DEFAULT_HEADER
+        return await self.make_dys_request("GET", url, headers=headers)
+
+    async def copy_document(self, doc_cid: str, parent_folder_cid: str = None, x_lang: str = None,
+                            add_copy_of_prefix: bool = False):
+        """
+        Copy a document to the root or a specified location
+        :param doc_cid: Document Cid
+        :param parent_folder_cid: (Optional) Target folder Cid that document will be copied. If none, target is root.
+        :param add_copy_of_prefix: (Optional) Determines if name prefix (Copy-of) added to copied items.
+        :param x_lang: (Optional) Copy Language Parameter. Ex: tr_TR or en_US. This decides if new document name
+        comes with Copy of or - Kopya
+        :return: :class:`httpx.Response` object
+        """
+        url = self.get_url("COPY").format(cid=doc_cid)
+        headers = self.HEADERS.copy()
+        headers["Content-Type"] = DEFAULT_HEADER
+        if x_lang:
+            headers["X-Lang"] = x_lang
+        params = {"addCopyOfPrefix": str(add_copy_of_prefix)}
+        if parent_folder_cid:
+            params.update({"targetFolderCid": parent_folder_cid})
+        return await self.make_dys_request("POST", url, headers, params=params)
+
+    async def rename_document(self, doc_cid: str, name: str):
+        """
+        Rename a document
+        :param doc_cid: Document Cid
+        :param name: New name of the document
+        :return: :class:`httpx.Response` object
+        """
+        end_point = self.get_url("RENAME").format(cid=doc_cid)
+        url = end_point + "?fileName=" + name
+        return await self.make_dys_request("POST", url)
+
+    async def delete(self, cid: str):
+        """
+        Delete and send a document or folder to recycle.
+        :param cid: Dys Cid
+        :return: :class:`httpx.Response` object
+        """
+        url = self.get_url("DELETE").format(cid=cid)
+        return await self.make_dys_request(method="DELETE", url=url)
+
+    async def delete_permanently(self, cid: str):
+        """
+        Delete a document or folder permanently.
+        :param cid: Dys Cid
+        :return: :class:`httpx.Response` object
+        """
+        url = self.get_url("DELETE_PERMA").format(cid=cid)
+        return await self.make_dys_request(method="DELETE", url=url)
@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+from typing import Callable, Tuple
+
+
+class TokenProvider:
+    """
+    Supplies the Logo IDM token used by DYSManager. Subclass it to plug in a token source.
+    """
+
+    def get_token(self) -> str:
+        """
+        :return: A token that is valid for the next request
+        """
+        raise NotImplementedError
+
+    def invalidate(self, token: str):
+        """
+        Called when DYS rejects token with 401. After it returns, get_token should return a fresh token if one
+        can be obtained.
+        :param token: The rejected token
+        """
+        pass
+
+
+class StaticTokenProvider(TokenProvider):
+    """
+    A fixed token that cannot be refreshed.
+    """
+
+    def __init__(self, token: str):
+        self.token = token
+
+    def get_token(self) -> str:
+        return self.token
+
+
+class RefreshingTokenProvider(TokenProvider):
+    """
+    Fetches tokens from a callable and refreshes them refresh_margin seconds before they expire.
+
+    Refreshes are single-flight: when many threads need a new token at the same time, or get 401 for the same
+    token, only one of them calls fetch_token and the others wait for its result.
+
+        def fetch_token():
+            response = requests.post(idm_url, data=credentials).json()
+            return response["access_token"], response["expires_in"]
+
+        manager = DYSManager(dys_base_url, RefreshingTokenProvider(fetch_token))
+    """
+
+    def __init__(self, fetch_token: Callable[[], Tuple[str, float]], refresh_margin: float = 60,
+                 timer=time.monotonic):
+        """
+        :param fetch_token: Callable returning a (token, expires_in_seconds) tuple
+        :param refresh_margin: Seconds before expiry a token is refreshed
+        """
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self._timer = timer
+        self._token = None
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_token(self) -> str:
+        token = self._token
+        if token is not None and self._timer() < self._refresh_at:
+            return token
+        with self._lock:
+            if self._token is None or self._timer() >= self._refresh_at:
+                self._refresh()
+            return self._token
+
+    def invalidate(self, token: str):
+        with self._lock:
+            # Callers that got 401 with an already replaced token just use the new one
+            if token == self._token:
+                self._refresh()
+
+    def _refresh(self):
+        token, expires_in = self.fetch_token()
+        self._token = token
+        self._refresh_at = self._timer() + max(0.0, expires_in - self.refresh_margin)
+        logging.info({'idm_token': 'refreshed', 'expires_in': expires_in})
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 300
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries also expire after a time to live.
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximum number of entries. The least recently used entry is evicted first.
+    ttl: float
+        Seconds an entry stays valid after it is set
+    hits: int
+        Number of lookups answered from the cache
+    misses: int
+        Number of lookups that were not in the cache or had expired
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL, timer=time.monotonic):
+        if maxsize <= 0 or ttl <= 0:
+            raise ValueError("Cache size and TTL must be positive!")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        :param key: Cache key
+        :param default: Returned when the key is missing or expired
+        :return: Cached value or default
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires > self._timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (self._timer() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys):
+        """
+        Remove keys from the cache. Missing keys are ignored.
+        """
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        :return: dict with size, hits and misses of the cache
+        """
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,118 @@
+"""
+Command line bulk transfer of directory trees between a local disk and DYS.
+
+    dys-transfer --url https://dys.logo.cloud upload ./reports <folder cid> --journal reports.db --workers 16
+    dys-transfer --url https://dys.logo.cloud download <folder cid> ./reports --journal reports.db
+
+The IDM token is read from --token or the DYS_TOKEN environment variable. Progress is recorded in the journal
+after every file, so running the same command again after an interruption continues where it stopped.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+from dys_connector.concurrency import DEFAULT_MAX_WORKERS
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.sync import SyncIndex, sync_directory
+from dys_connector.tree import CopyJournal, download_tree
+
+
+class Throughput:
+    """
+    Counts finished files and transferred bytes and redraws a one line summary at most every interval seconds.
+    """
+
+    def __init__(self, stream=None, interval: float = 0.5, timer=time.monotonic):
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.files = 0
+        self.skipped = 0
+        self.bytes = 0
+        self._timer = timer
+        self._start = timer()
+        self._shown = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, kind: str, path: str, size: int):
+        with self._lock:
+            if kind == "unchanged":
+                self.skipped += 1
+            else:
+                self.files += 1
+                self.bytes += size
+            if self._timer() - self._shown >= self.interval:
+                self.show()
+
+    def summary(self) -> str:
+        elapsed = max(self._timer() - self._start, 1e-9)
+        return (f"{self.files} transferred, {self.skipped} skipped, {self.bytes / 1e6:.1f} MB, "
+                f"{self.files / elapsed:.1f} files/s, {self.bytes / 1e6 / elapsed:.2f} MB/s")
+
+    def show(self, end: str = ""):
+        self._shown = self._timer()
+        self.stream.write("\r" + self.summary() + end)
+        self.stream.flush()
+
+
+def upload(manager: DYSManager, args, progress: Throughput):
+    with SyncIndex(args.journal) as index:
+        return sync_directory(manager, args.local_dir, args.folder_cid, index, doc_type_id=args.doc_type_id,
+                              extensions=args.extensions or None, delete_removed=args.delete_removed,
+                              max_workers=args.workers, mime_type=args.mime_type,
+                              hash_processes=args.hash_processes, progress=progress, keep_paths=False)
+
+
+def download(manager: DYSManager, args, progress: Throughput):
+    with CopyJournal(args.journal) as journal:
+        return download_tree(manager, args.folder_cid, args.local_dir, journal=journal, max_workers=args.workers,
+                             progress=progress)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="dys-transfer", description="Resumable bulk transfer of directory trees")
+    parser.add_argument("--url", default=os.environ.get("DYS_URL"), help="DYS base url, defaults to $DYS_URL")
+    parser.add_argument("--token", default=os.environ.get("DYS_TOKEN"), help="IDM token, defaults to $DYS_TOKEN")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Files transferred in parallel")
+    parser.add_argument("--quiet", action="store_true", help="Do not show throughput")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upload_parser = commands.add_parser("upload", help="Upload new and changed files of a local directory tree")
+    upload_parser.add_argument("local_dir")
+    upload_parser.add_argument("folder_cid", help="DYS folder receiving the content of local_dir")
+    upload_parser.add_argument("--journal", default="dys-upload.db", help="Checkpoint journal file")
+    upload_parser.add_argument("--doc-type-id", help="Document type id of uploaded documents")
+    upload_parser.add_argument("--extensions", nargs="*", help="Only upload files with these extensions")
+    upload_parser.add_argument("--mime-type", help="Mime type of uploaded files, guessed from file names if unset")
+    upload_parser.add_argument("--hash-processes", type=int, default=0,
+                               help="Hash files in this many processes instead of the worker threads")
+    upload_parser.add_argument("--delete-removed", action="store_true",
+                               help="Delete documents whose local file was removed since the last run")
+    upload_parser.set_defaults(run=upload)
+
+    download_parser = commands.add_parser("download", help="Download a DYS folder tree")
+    download_parser.add_argument("folder_cid")
+    download_parser.add_argument("local_dir")
+    download_parser.add_argument("--journal", default="dys-download.db", help="Checkpoint journal file")
+    download_parser.set_defaults(run=download)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.url or not args.token:
+        parser.error("--url and --token (or DYS_URL and DYS_TOKEN) are required")
+    progress = Throughput(interval=float("inf") if args.quiet else 0.5)
+    with DYSManager(args.url, args.token, pool_maxsize=args.workers) as manager:
+        report = args.run(manager, args, progress)
+    if not args.quiet:
+        progress.show(end="\n")
+    for key, error in report.failed.items():
+        sys.stderr.write(f"failed {key}: {error!r}\n")
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable
+
+DEFAULT_MAX_WORKERS = 8
+
+BulkResult = namedtuple("BulkResult", ["item", "result", "error"])
+BulkResult.__doc__ = """
+Outcome of a single item of a bulk operation.
+item -- the input item
+result -- return value of the operation, None if it failed
+error -- exception raised by the operation, None if it succeeded
+"""
+
+
+def bounded_map(fn: Callable, items: Iterable, max_workers: int = DEFAULT_MAX_WORKERS):
+    """
+    Apply fn to every item on a thread pool and yield results in completion order.
+    At most 2 * max_workers items are taken from items at a time, so memory stays flat for arbitrarily
+    long (or lazy) inputs. Exceptions raised by fn are captured in the result instead of aborting the batch.
+    :param fn: Callable that takes a single item
+    :param items: Iterable of items
+    :param max_workers: Number of worker threads
+    :return: Generator of :class:`BulkResult`
+    """
+    max_pending = max_workers * 2
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for item in items:
+                pending[executor.submit(fn, item)] = item
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from _collect(done, pending)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from _collect(done, pending)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _collect(done, pending):
+    for future in done:
+        item = pending.pop(future)
+        error = future.exception()
+        if error is None:
+            yield BulkResult(item, future.result(), None)
+        else:
+            yield BulkResult(item, None, error)
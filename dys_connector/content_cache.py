@@ -0,0 +1,232 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from dys_connector.dys_api_manager import DEFAULT_CHUNK_SIZE, DYSManager
+
+DEFAULT_CONTENT_CACHE_SIZE = 1024 * 1024 * 1024
+# Seconds a process waits for another one holding the cache index lock
+INDEX_TIMEOUT = 30
+
+_Entry = namedtuple("_Entry", ["cid", "file", "validator", "etag", "last_modified", "size"])
+
+
+class ContentCache:
+    """
+    A size bounded on-disk cache of document contents that can be shared by processes and kept across restarts.
+
+    A cached copy is used only while it is still current: its version and last modified date are compared with
+    get_document_without_content, so configure DYSManager with a cache to skip that call for recently checked
+    documents. When DYS reports neither, the copy is revalidated with If-None-Match / If-Modified-Since if the
+    content response carried an ETag or Last-Modified header, and not cached otherwise.
+    The least recently used documents are evicted once the total size exceeds max_size.
+
+        content_cache = ContentCache("/var/cache/dys", max_size=10 * 1024 ** 3)
+        with content_cache.open(manager, doc_cid) as file:
+            render(file)
+
+    Attributes
+    ----------
+    directory : str
+        Directory holding the content files and the SQLite index
+    max_size: int
+        Maximum total size of cached contents in bytes
+    hits: int
+        Number of reads answered from the cache by this instance
+    misses: int
+        Number of reads that downloaded the content
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_CONTENT_CACHE_SIZE):
+        if max_size <= 0:
+            raise ValueError("Cache size must be positive!")
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(directory, "index.db"), timeout=INDEX_TIMEOUT,
+                                           isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (cid TEXT PRIMARY KEY, file TEXT NOT NULL, validator TEXT, "
+            "etag TEXT, last_modified TEXT, size INTEGER NOT NULL, accessed REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self, manager: DYSManager, doc_cid: str):
+        """
+        Open the current content of a document, downloading it only if the cached copy is missing or outdated.
+        :param manager: DYS manager used for validation and download
+        :param doc_cid: Document Cid
+        :return: Binary file object positioned at the start. The caller must close it.
+        """
+        validator = self._validator(manager, doc_cid)
+        entry = self._lookup(doc_cid)
+        if entry is not None and validator is not None and entry.validator == validator:
+            file = self._open_entry(entry)
+            if file is not None:
+                self._count_hit()
+                return file
+        conditional = entry is not None and validator is None
+        return self._download(manager, doc_cid, validator, entry if conditional else None)
+
+    def read(self, manager: DYSManager, doc_cid: str) -> bytes:
+        """
+        :return: Current content of a document, see open
+        """
+        with self.open(manager, doc_cid) as file:
+            return file.read()
+
+    def invalidate(self, *cids):
+        with self._transaction() as connection:
+            for cid in cids:
+                row = connection.execute("SELECT file FROM entries WHERE cid = ?", (cid,)).fetchone()
+                if row:
+                    connection.execute("DELETE FROM entries WHERE cid = ?", (cid,))
+                    self._remove_file(row[0])
+
+    def clear(self):
+        with self._transaction() as connection:
+            for (file,) in connection.execute("SELECT file FROM entries").fetchall():
+                self._remove_file(file)
+            connection.execute("DELETE FROM entries")
+
+    def size(self) -> int:
+        """
+        :return: Total size of cached contents in bytes
+        """
+        with self._lock:
+            return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def _validator(manager: DYSManager, doc_cid: str):
+        info = manager.get_document_without_content(doc_cid, typed=True)
+        if info.version is None and info.modified is None:
+            return None
+        return f"{info.version}|{info.modified}"
+
+    def _lookup(self, doc_cid: str):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT cid, file, validator, etag, last_modified, size FROM entries WHERE cid = ?",
+                (doc_cid,)).fetchone()
+        return _Entry(*row) if row else None
+
+    def _open_entry(self, entry: _Entry):
+        try:
+            file = open(os.path.join(self.directory, entry.file), "rb")
+        except FileNotFoundError:
+            # Evicted by another process after the lookup
+            return None
+        with self._lock:
+            self._connection.execute("UPDATE entries SET accessed = ? WHERE cid = ?", (time.time(), entry.cid))
+        return file
+
+    def _download(self, manager: DYSManager, doc_cid: str, validator, entry: _Entry):
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        with manager.get_document_content(doc_cid, stream=True, headers=headers or None) as response:
+            if response.status_code == 304:
+                file = self._open_entry(entry)
+                if file is not None:
+                    self._count_hit()
+                    return file
+                return self._download(manager, doc_cid, validator, None)
+            with self._lock:
+                self.misses += 1
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            file = tempfile.NamedTemporaryFile(dir=self.directory, prefix=".download-", delete=False)
+            try:
+                for chunk in response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE):
+                    file.write(chunk)
+                size = file.tell()
+                file.seek(0)
+                key = validator or etag or last_modified
+                if key is None or size > self.max_size:
+                    # Cannot be validated later or does not fit, handed out without caching
+                    os.unlink(file.name)
+                    return file
+                name = hashlib.sha256(f"{doc_cid}\0{key}".encode("utf-8")).hexdigest()
+                os.replace(file.name, os.path.join(self.directory, name))
+            except BaseException:
+                file.close()
+                if os.path.exists(file.name):
+                    os.unlink(file.name)
+                raise
+        self._store(_Entry(doc_cid, name, validator, etag, last_modified, size))
+        return file
+
+    def _store(self, entry: _Entry):
+        with self._transaction() as connection:
+            row = connection.execute("SELECT file FROM entries WHERE cid = ?", (entry.cid,)).fetchone()
+            if row and row[0] != entry.file:
+                self._remove_file(row[0])
+            connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               tuple(entry) + (time.time(),))
+            total = connection.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+            while total > self.max_size:
+                cid, file, size = connection.execute(
+                    "SELECT cid, file, size FROM entries WHERE cid != ? ORDER BY accessed LIMIT 1",
+                    (entry.cid,)).fetchone()
+                connection.execute("DELETE FROM entries WHERE cid = ?", (cid,))
+                self._remove_file(file)
+                total -= size
+
+    def _count_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def _transaction(self):
+        return _Transaction(self._connection, self._lock)
+
+    def _remove_file(self, name: str):
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+
+class _Transaction:
+    """
+    An immediate SQLite transaction, serializing index writes of every process sharing the cache.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.Lock):
+        self.connection = connection
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
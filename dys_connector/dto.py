@@ -48,3 +48,123 @@ class SharingDTO(BaseModel):
     recipientId: Optional[str] = ""
     role: Optional[str] = SharingRole.CONSUMER.value
     customEnabled: Optional[bool] = True
+
+
+class ClearDirectoryReport:
+    """
+    Result of clearing a directory.
+
+    Attributes
+    ----------
+    cid : str
+        Cid of the cleared directory
+    deleted: list
+        Cids of deleted items
+    failed: dict
+        Cids of items that could not be deleted mapped to the raised exception
+    """
+    def __init__(self, cid: str):
+        self.cid = cid
+        self.deleted = []
+        self.failed = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def __repr__(self):
+        return f"ClearDirectoryReport(cid={self.cid!r}, deleted={len(self.deleted)}, failed={len(self.failed)})"
+
+
+class CopyTreeReport:
+    """
+    Result of copying a folder hierarchy.
+
+    Attributes
+    ----------
+    cid : str
+        Cid of the copied root folder
+    target_cid: str
+        Cid of the new root folder, None if it could not be created
+    mapping: dict
+        Source cids mapped to the cids of their copies, including copies made by earlier runs of the same journal
+    failed: dict
+        Source cids that could not be copied mapped to the raised exception
+    """
+    def __init__(self, cid: str):
+        self.cid = cid
+        self.target_cid = None
+        self.mapping = {}
+        self.failed = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def __repr__(self):
+        return (f"CopyTreeReport(cid={self.cid!r}, target_cid={self.target_cid!r}, copied={len(self.mapping)}, "
+                f"failed={len(self.failed)})")
+
+
+def _first(values: dict, *keys):
+    for key in keys:
+        value = values.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+class DirectoryEntry:
+    """
+    Compact entry of a get_dir_structure response. Keeps only the commonly used fields, so large listings take a
+    fraction of the memory of the response dicts.
+    """
+    __slots__ = ("cid", "name", "type", "parent_cid", "size", "modified")
+
+    def __init__(self, cid: str, name: str = None, type: str = None, parent_cid: str = None, size: int = None,
+                 modified=None):
+        self.cid = cid
+        self.name = name
+        self.type = type
+        self.parent_cid = parent_cid
+        self.size = size
+        self.modified = modified
+
+    @classmethod
+    def from_dict(cls, entry: dict):
+        return cls(entry["cid"], entry.get("name"), _first(entry, "type", "documentType"),
+                   _first(entry, "parentCid", "parentFolderCid", "parent"), _first(entry, "size", "fileSize"),
+                   _first(entry, "lastModifiedDate", "modifiedDate", "updatedDate"))
+
+    def __eq__(self, other):
+        return isinstance(other, DirectoryEntry) and all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"DirectoryEntry(cid={self.cid!r}, name={self.name!r}, type={self.type!r})"
+
+
+class DocumentInfo(DirectoryEntry):
+    """
+    Compact get_document_without_content response.
+    """
+    __slots__ = ("version", "tag_ids")
+
+    def __init__(self, cid: str, name: str = None, type: str = None, parent_cid: str = None, size: int = None,
+                 modified=None, version=None, tag_ids: list = None):
+        super().__init__(cid, name, type, parent_cid, size, modified)
+        self.version = version
+        self.tag_ids = tag_ids
+
+    @classmethod
+    def from_dict(cls, document: dict):
+        entry = DirectoryEntry.from_dict(document)
+        return cls(entry.cid, entry.name, entry.type, entry.parent_cid, entry.size, entry.modified,
+                   _first(document, "version", "versionNumber"), document.get("tagIds"))
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentInfo) and super().__eq__(other) and \
+            (self.version, self.tag_ids) == (other.version, other.tag_ids)
+
+    def __repr__(self):
+        return f"DocumentInfo(cid={self.cid!r}, name={self.name!r}, version={self.version!r})"
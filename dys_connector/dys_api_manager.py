@@ -1,12 +1,44 @@
+import copy
 import json
 import logging
+import os
+import threading
+import time
 import requests
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from typing import Callable, Iterable
+from requests.adapters import HTTPAdapter
 
 import dys_connector.exceptions as dys_exc
-from dys_connector.dto import VerificationType
+import dys_connector.json_decoder as json_decoder
+from dys_connector.auth import StaticTokenProvider, TokenProvider
+from dys_connector.cache import TTLCache
+from dys_connector.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from dys_connector.dto import (ClearDirectoryReport, DirectoryEntry, DocumentInfo, UploadDocumentDTO,
+                               VerificationType)
+from dys_connector.metrics import NOOP_METRICS, MetricsHook
+from dys_connector.multipart import MultipartStream
+from dys_connector.ratelimit import RateLimiter
+from dys_connector.retry import CONNECTION_ERRORS, CircuitBreaker, RetryPolicy, is_server_failure
+from dys_connector.singleflight import SingleFlight
 
 DEFAULT_HEADER = "application/json"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# DYS supports maximum 10000 entries for a structure request
+MAX_PAGE_SIZE = 10000
+DEFAULT_PAGE_SIZE = 1000
+# Number of locks serializing share link creation per document
+SHARE_LOCK_STRIPES = 64
+# Response bodies are cut to this many bytes in logs
+MAX_LOG_BODY_SIZE = 1000
+# Suffixes of the file a download is written to and of the file keeping the validator it can be resumed with
+PART_SUFFIX = ".part"
+VALIDATOR_SUFFIX = ".validator"
 
 # Used endpoints of DYS
 ENDPOINTS = {
@@ -27,6 +59,70 @@ ENDPOINTS = {
 }
 
 
+def _truncate_body(response) -> str:
+    body = response.content[:MAX_LOG_BODY_SIZE + 1]
+    text = body[:MAX_LOG_BODY_SIZE].decode("utf-8", errors="replace")
+    return text + "..." if len(body) > MAX_LOG_BODY_SIZE else text
+
+
+def _request_log(method: str, url: str, endpoint: str, corid: str, kwargs: dict) -> dict:
+    """
+    Request summary for logs. Request bodies such as data and files are never included.
+    """
+    log = {'method': method, 'url': url}
+    if endpoint:
+        log['endpoint'] = endpoint
+    if kwargs.get('params'):
+        log['params'] = kwargs['params']
+    if corid:
+        log['corid'] = corid
+    return log
+
+
+def _share_matches(item: dict, download_disabled: bool, verification_type: VerificationType) -> bool:
+    """
+    Whether an existing external share can be reused for the requested options.
+    Shares without option fields are treated as default shares.
+    """
+    def flag(key):
+        return str(item.get(key, False)).lower() == "true"
+
+    if flag("cancelled") or flag("disposable") or flag("passwordProtected"):
+        return False
+    verification = str(item.get("verificationType", VerificationType.NONE.value[0]))
+    return flag("downloadDisabled") == download_disabled and \
+        verification in (str(verification_type.value[0]), verification_type.value[1], verification_type.name)
+
+
+def _parse_content_range(value: str):
+    """
+    :return: (first byte, total size) of a "bytes first-last/total" Content-Range, total is None if unknown
+    """
+    if not value or not value.startswith("bytes ") or "/" not in value:
+        return None
+    byte_range, total = value[6:].split("/", 1)
+    if "-" not in byte_range:
+        return None
+    try:
+        return int(byte_range.split("-", 1)[0]), None if total == "*" else int(total)
+    except ValueError:
+        return None
+
+
+def _range_validator(response: requests.Response):
+    # Weak ETags cannot be used with If-Range
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _response_size(response: requests.Response, stream: bool) -> int:
+    if stream:
+        return int(response.headers.get("Content-Length") or 0)
+    return len(response.content)
+
+
 class Container(Enum):
     """
     Container Type Enum
@@ -53,20 +149,188 @@ class DYSManager:
     dys_base_url : str
         Dys Endpoint e.g.: "https://dys.logo.cloud"
     TOKEN: str
-        Logo IDM token for Authentication & Authorization
+        Current Logo IDM token for Authentication & Authorization
+    token_provider: TokenProvider
+        Source of TOKEN. Tokens rejected with 401 are refreshed once and the request is replayed.
+    session: requests.Session
+        Keep-alive session whose connection pool is shared by every request of the manager
+    timeout: tuple
+        (connect, read) timeouts in seconds applied to every request
+    cache: TTLCache
+        Optional cache of document metadata and document info. Writes made through the manager invalidate it.
+    share_cache: TTLCache
+        External share links resolved by resolve_external_share, keyed by document cid
+    retry_policy: RetryPolicy
+        Retry policy of endpoints without an entry in retry_policies
+    retry_policies: dict
+        ENDPOINTS keys mapped to their own RetryPolicy
+    circuit_breaker: CircuitBreaker
+        Optional circuit breaker, fails fast while DYS keeps returning server errors
+    rate_limiter: RateLimiter
+        Optional client side rate limiter, can be shared by several managers
+    metrics: MetricsHook
+        Receives per endpoint request metrics, a no-op by default
+    json_loads: Callable
+        Decodes JSON response bodies from bytes
+    single_flight: SingleFlight
+        Set when coalesce is enabled. Concurrent identical reads share one request.
+
+    The manager can be used as a context manager to release pooled connections:
+
+        with DYSManager(dys_base_url, idm_token) as manager:
+            manager.check_state()
     """
 
-    def __init__(self, dys_base_url, idm_token, corid=None):
+    def __init__(self, dys_base_url, idm_token, corid=None, pool_connections: int = DEFAULT_POOL_SIZE,
+                 pool_maxsize: int = DEFAULT_POOL_SIZE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, cache: TTLCache = None, share_cache: TTLCache = None,
+                 retry_policy: RetryPolicy = None, retry_policies: dict = None,
+                 circuit_breaker: CircuitBreaker = None, rate_limiter: RateLimiter = None,
+                 metrics: MetricsHook = None, json_loads: Callable = None, coalesce: bool = False):
+        """
+        :param dys_base_url: Dys Endpoint e.g.: "https://dys.logo.cloud"
+        :param idm_token: Logo IDM token or a TokenProvider. Ex: RefreshingTokenProvider(fetch_token)
+        :param corid: (Optional) Correlation id sent with every request
+        :param pool_connections: Number of per-host connection pools to cache
+        :param pool_maxsize: Maximum number of pooled connections kept alive per host
+        :param connect_timeout: Seconds to wait for a connection to DYS. None waits forever.
+        :param read_timeout: Seconds to wait for DYS to send a response. None waits forever.
+        :param cache: (Optional) Cache for get_doc_metadata and get_document_without_content results.
+        Ex: TTLCache(maxsize=10000, ttl=600)
+        :param share_cache: (Optional) Cache of resolve_external_share links. A default sized TTLCache if not set.
+        :param retry_policy: (Optional) Default retry policy. Idempotent requests are retried on 502, 503, 504 and
+        connection errors by default, pass retry.NO_RETRY to disable retrying.
+        :param retry_policies: (Optional) Per endpoint retry policies.
+        Ex: {"UPLOAD_DOCUMENT": RetryPolicy(methods=retry.ALL_METHODS)} to retry uploads.
+        :param circuit_breaker: (Optional) Circuit breaker. It is closed again once check_state reports FINE.
+        :param rate_limiter: (Optional) Rate limiter applied to every request, retries included
+        :param metrics: (Optional) Metrics hook called for every request attempt. Ex: InMemoryMetrics()
+        :param json_loads: (Optional) Callable decoding JSON bytes. Defaults to orjson when installed, json otherwise.
+        :param coalesce: Let concurrent identical calls of get_doc_metadata, get_document_without_content,
+        get_dir_structure and get_external_share share one request and its result. Results are not kept after
+        the request completes, and a call arriving after a write of this manager never joins a request started
+        before it.
+        """
         if None in (dys_base_url, idm_token):
             raise ValueError("DYS Base Url or IDM Token cannot be None!")
         if dys_base_url[-1] == '/':
             dys_base_url = dys_base_url[:-1]
         self.dys_base_url = dys_base_url
-        self.TOKEN = idm_token
-        self.HEADERS = {
+        self.token_provider = idm_token if isinstance(idm_token, TokenProvider) else StaticTokenProvider(idm_token)
+        self.corid = corid
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = self._create_session(pool_connections, pool_maxsize)
+        self.cache = cache
+        self.share_cache = share_cache if share_cache is not None else TTLCache()
+        # Cache keys being loaded mapped to [generation, number of loads], see _cached
+        self._generations = {}
+        self._generation_lock = threading.Lock()
+        self._share_locks = [threading.Lock() for _ in range(SHARE_LOCK_STRIPES)]
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.retry_policies = retry_policies or {}
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics or NOOP_METRICS
+        self.json_loads = json_loads or json_decoder.loads
+        self.single_flight = SingleFlight() if coalesce else None
+
+    @property
+    def TOKEN(self) -> str:
+        return self.token_provider.get_token()
+
+    @TOKEN.setter
+    def TOKEN(self, token: str):
+        self.token_provider = StaticTokenProvider(token)
+
+    @property
+    def HEADERS(self) -> dict:
+        return {
             "Authorization": "Bearer " + self.TOKEN,
         }
-        self.corid = corid
+
+    @staticmethod
+    def _create_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=False)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _cached(self, task: str, cid: str, load):
+        """
+        Return a copy of the cached result of task for cid, loading and caching it on a miss.
+        Copies keep callers that modify results from altering the cache.
+        """
+        if self.cache is None:
+            return self._coalesced((task, cid), load)
+        key = (task, cid)
+        value = self.cache.get(key)
+        if value is None:
+            # A write invalidating key while load runs bumps its generation, the possibly outdated result of load
+            # is then returned but not cached
+            with self._generation_lock:
+                state = self._generations.setdefault(key, [0, 0])
+                state[1] += 1
+                generation = state[0]
+            cache_value = False
+            try:
+                value = self._coalesced(key, load)
+                cache_value = True
+            finally:
+                with self._generation_lock:
+                    state[1] -= 1
+                    if not state[1]:
+                        del self._generations[key]
+                    if cache_value and state[0] == generation:
+                        self.cache.set(key, value)
+        return copy.deepcopy(value)
+
+    def _coalesced(self, key: tuple, load):
+        """
+        Run load, sharing one call with concurrent callers of the same key when coalescing is enabled.
+        A shared result is copied for every caller, so no caller sees changes made by another.
+        """
+        if self.single_flight is None:
+            return load()
+        value, shared = self.single_flight.do(key, load)
+        return copy.deepcopy(value) if shared else value
+
+    def _invalidate(self, cid: str, shares: bool = False):
+        if self.cache is not None:
+            keys = (("GET_DOC_META", cid), ("GET_DOC_INFO", cid))
+            with self._generation_lock:
+                for key in keys:
+                    if key in self._generations:
+                        self._generations[key][0] += 1
+                self.cache.invalidate(*keys)
+        self._forget(("GET_DOC_META", cid), ("GET_DOC_INFO", cid), ("EXTERNAL_SHARE", cid))
+        if shares:
+            self.share_cache.invalidate(cid)
+
+    def _forget(self, *keys):
+        # Reads started before a write must not be joined by callers arriving after it
+        if self.single_flight is not None:
+            self.single_flight.forget(*keys)
+
+    def _forget_listings(self, folder_cid: str = None):
+        """
+        Forget the get_dir_structure calls in flight for a folder whose content a write changed, or for every
+        folder if the changed folder is not known.
+        """
+        if self.single_flight is not None:
+            self.single_flight.forget_if(lambda key: key[0] == "DIR_STRUCTURE" and folder_cid in (None, key[1]))
+
+    def close(self):
+        """
+        Close pooled connections of the manager. The manager must not be used afterwards.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def get_url(self, task: str):
         """
@@ -78,49 +342,159 @@ class DYSManager:
         return self.dys_base_url + ENDPOINTS[task]
 
     @staticmethod
-    def check_dys_exception(response: requests.Response):
+    def check_dys_exception(response: requests.Response, log_body: bool = True):
         code = response.status_code
 
+        if code == 304:
+            # Answer to a conditional request of the caller, its copy of the resource is still valid
+            return
         if int(code / 100) == 2:
-            logging.debug({'status_code': code, 'dys_response': response.text})
+            if log_body and logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug({'status_code': code, 'dys_response': _truncate_body(response)})
         else:
-            logging.error({'status_code': code, 'dys_response': response.text})
+            logging.error({'status_code': code, 'dys_response': _truncate_body(response)})
 
         if code == 400:
-            raise dys_exc.DysBadRequestError()
+            exc = dys_exc.DysBadRequestError()
         elif code == 401:
-            raise dys_exc.DysUnauthorizedError()
+            exc = dys_exc.DysUnauthorizedError()
         elif code == 500:
-            raise dys_exc.DysInternalServerError()
+            exc = dys_exc.DysInternalServerError()
         elif code == 502:
-            raise dys_exc.DysBadGatewayError()
+            exc = dys_exc.DysBadGatewayError()
         elif code == 503:
-            raise dys_exc.DysServiceTemporarilyUnavailable()
+            exc = dys_exc.DysServiceTemporarilyUnavailable()
         elif int(code / 100) != 2:
-            raise dys_exc.DysHttpException(status_code=code)
+            exc = dys_exc.DysHttpException(status_code=code)
+        else:
+            return
+        exc.response = response
+        raise exc
 
-    def make_dys_request(self, method: str, url: str, headers=None, **kwargs):
+    def make_dys_request(self, method: str, url: str, headers=None, endpoint: str = None, **kwargs):
         """
-        General DYS requests with basic error handling
+        General DYS requests with basic error handling.
+        Transient failures are retried according to the retry policy of the endpoint and the circuit breaker,
+        if any, fails fast while DYS keeps failing.
         :param method: Request method. Ex: "GET", "POST", "PUT"
         :param url: Request url
         :param headers: (optional) Request headers
+        :param endpoint: (optional) ENDPOINTS key of the request, used to select its retry policy
         :param kwargs: (optional) Optional parameters of request method. Ex: data, files etc.
         :return: :class:`Response <Response>` object
         """
-        log = {**{'method': method, 'url': url}, **kwargs}
         if not headers:
             headers = self.HEADERS.copy()
         if self.corid:
             headers.update({'corid': self.corid})
-            log.update({'corid': self.corid})
 
-        logging.info(log)
+        if logging.root.isEnabledFor(logging.INFO):
+            logging.info(_request_log(method, url, endpoint, self.corid, kwargs))
+
+        kwargs.setdefault("timeout", self.timeout)
+        policy = self.retry_policies.get(endpoint, self.retry_policy)
+        # The health check of the breaker goes through check_state, so it must not be blocked by the breaker
+        breaker = self.circuit_breaker if endpoint != "STATE" else None
+        attempt = 0
+        token_refreshed = False
+        while True:
+            if breaker:
+                breaker.before_request(health_check=self._is_healthy)
+            try:
+                response = self._send(method, url, headers, endpoint, kwargs)
+            except (dys_exc.DysHttpException,) + CONNECTION_ERRORS as e:
+                if breaker:
+                    if is_server_failure(e):
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if isinstance(e, dys_exc.DysUnauthorizedError) and not token_refreshed:
+                    token_refreshed = True
+                    if self._refresh_authorization(headers) and self._rewind(kwargs):
+                        continue
+                if attempt >= policy.total or not policy.is_retryable(method, e) or not self._rewind(kwargs):
+                    raise
+                wait = policy.backoff(attempt, e)
+                attempt += 1
+                logging.warning({'method': method, 'url': url, 'retry': attempt, 'wait': round(wait, 3),
+                                 'error': repr(e)})
+                time.sleep(wait)
+                continue
+            if breaker:
+                breaker.record_success()
+            return response
+
+    def _send(self, method: str, url: str, headers: dict, endpoint: str, kwargs: dict) -> requests.Response:
+        if self.rate_limiter is None:
+            return self._send_measured(method, url, headers, endpoint, kwargs)
+        with self.rate_limiter.limit(endpoint) as slot:
+            try:
+                return self._send_measured(method, url, headers, endpoint, kwargs)
+            except (dys_exc.DysHttpException,) + CONNECTION_ERRORS as e:
+                slot.error = is_server_failure(e)
+                raise
 
-        response = requests.request(method, url, headers=headers, **kwargs)
-        self.check_dys_exception(response)
+    def _send_measured(self, method: str, url: str, headers: dict, endpoint: str, kwargs: dict):
+        stream = kwargs.get("stream", False)
+        if not self.metrics.enabled:
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            self.check_dys_exception(response, log_body=not stream)
+            return response
+        response = None
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, **kwargs)
+        finally:
+            latency = time.perf_counter() - start
+            if response is None:
+                self.metrics.record(endpoint, method, None, latency, 0, 0)
+            else:
+                self.metrics.record(endpoint, method, response.status_code, latency,
+                                    int(response.request.headers.get("Content-Length") or 0),
+                                    _response_size(response, stream))
+        self.check_dys_exception(response, log_body=not stream)
         return response
 
+    @staticmethod
+    def _rewind(kwargs: dict) -> bool:
+        """
+        Move request bodies back to their start before a retry.
+        :return: False if a body cannot be sent again
+        """
+        data = kwargs.get("data")
+        if data is not None and not isinstance(data, (bytes, str, dict, list, tuple)):
+            if not hasattr(data, "seek"):
+                return False
+            data.seek(0)
+        files = kwargs.get("files") or []
+        # requests accepts files as a dict or as a list of (field, file) pairs
+        for _, file in files.items() if isinstance(files, Mapping) else files:
+            source = file[1] if isinstance(file, tuple) else file
+            if hasattr(source, "seek"):
+                source.seek(0)
+            elif hasattr(source, "read"):
+                return False
+        return True
+
+    def _refresh_authorization(self, headers: dict) -> bool:
+        """
+        Replace a rejected token in headers with a fresh one of the token provider.
+        :return: False if the request did not carry a token or no new token could be obtained
+        """
+        authorization = headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            return False
+        rejected = authorization[len("Bearer "):]
+        self.token_provider.invalidate(rejected)
+        token = self.token_provider.get_token()
+        if token == rejected:
+            return False
+        headers["Authorization"] = "Bearer " + token
+        return True
+
+    def _is_healthy(self) -> bool:
+        return self.check_state() == "FINE"
+
     def check_state(self):
         """
         Check for DYS Application State
@@ -132,10 +506,10 @@ class DYSManager:
             If request is not successful, returns response text.
         """
         url = self.get_url("STATE")
-        res = self.make_dys_request("GET", url=url, headers={})
+        res = self.make_dys_request("GET", url=url, headers={}, endpoint="STATE")
         if res.status_code not in [200, 202]:
             return res.text
-        status_dict = json.loads(res.text)
+        status_dict = self.json_loads(res.content)
         if "state" in status_dict.keys():
             return status_dict["state"]
         return res
@@ -150,8 +524,11 @@ class DYSManager:
         url = self.get_url("UPLOAD_FOLDER") + "?parentFolderCid=" + parent_folder_cid + "&folderName=" + folder_name
         headers = self.HEADERS.copy()
         headers["Content-Type"] = f"{DEFAULT_HEADER};charset=UTF-8"
-        response = self.make_dys_request("POST", url, headers=headers)
-        value_parent = json.loads(response.text)
+        try:
+            response = self.make_dys_request("POST", url, headers=headers, endpoint="UPLOAD_FOLDER")
+        finally:
+            self._forget_listings(parent_folder_cid)
+        value_parent = self.json_loads(response.content)
         return value_parent["cid"]
 
     def post_content(self, parent_folder_cid: str, payload: dict, files: list):
@@ -167,37 +544,136 @@ class DYSManager:
             "parentFolderCid": parent_folder_cid,
             "mimeType": "text/html"
         }
-        response = self.make_dys_request("POST", url, data=payload, files=files, params=params)
+        try:
+            response = self.make_dys_request("POST", url, data=payload, files=files, params=params,
+                                             endpoint="UPLOAD_DOCUMENT")
+        finally:
+            self._forget_listings(parent_folder_cid)
         return response
 
+    def upload_document(self, parent_folder_cid: str, dto: UploadDocumentDTO, source,
+                        mime_type: str = "text/html") -> str:
+        """
+        Uploads a document to DYS, streaming the multipart body so the document is never loaded into memory.
+        :param parent_folder_cid: Parent folder cid that document will be uploaded
+        :param dto: Upload document DTO. Its name is used as the file name.
+        :param source: File path, readable binary file object or bytes-like object (bytes, memoryview, mmap)
+        :param mime_type: Mime type of the document
+        :return: Cid of the uploaded document
+        """
+        url = self.get_url("UPLOAD_DOCUMENT")
+        params = {
+            "parentFolderCid": parent_folder_cid,
+            "mimeType": mime_type
+        }
+        with MultipartStream(fields=[("uploadDocumentDTO", dto.get_as_json())],
+                             files=[("file", dto.name, source, mime_type)]) as body:
+            headers = self.HEADERS.copy()
+            headers["Content-Type"] = body.content_type
+            try:
+                response = self.make_dys_request("POST", url, headers=headers, data=body, params=params,
+                                                 endpoint="UPLOAD_DOCUMENT")
+            finally:
+                self._forget_listings(parent_folder_cid)
+        return self.json_loads(response.content)["cid"]
+
+    def post_contents(self, items: Iterable, max_workers: int = DEFAULT_MAX_WORKERS, mime_type: str = "text/html"):
+        """
+        Uploads many documents concurrently. Items are consumed lazily and results are yielded as soon as
+        they complete, so a failing document does not abort the batch.
+        Use a pool_maxsize of at least max_workers to keep every worker on a pooled connection.
+        :param items: Iterable of (parent_folder_cid, UploadDocumentDTO, source) tuples. See upload_document.
+        :param max_workers: Number of parallel uploads
+        :param mime_type: Mime type of the file parts
+        :return: Generator of :class:`BulkResult`. result is the new document cid, error the raised exception.
+        """
+        def upload(item):
+            parent_folder_cid, dto, source = item
+            return self.upload_document(parent_folder_cid, dto, source, mime_type=mime_type)
+
+        return bounded_map(upload, items, max_workers=max_workers)
+
     def get_dir_structure(self, folder_cid: str, cont_group: Container = Container.DIRECTORY, _from: int = 0,
-                          _to: int = 10000):
+                          _to: int = 10000, typed: bool = False):
         """
-        Get content list of a directory.
+        Get content list of a directory. Use iter_dir_structure to list folders with more than 10000 entries.
         :param folder_cid: Directory Cid
         :param _from: (default:0) Ignore files till from parameter
         :param _to: (default:10000) File limit. DYS supports maximum 10000 for structure request.
         :param cont_group: Container type defaults to SPACE
+        :param typed: Return compact DirectoryEntry objects instead of dicts
         :return: List of Dicts. Each dict refers the basic information of a document.
         """
         url = self.get_url(
             "DIR_STRUCTURE") + f"?folderCid={folder_cid}&from={_from}&size={_to}&containerType={cont_group.name}"
         headers = self.HEADERS.copy()
         headers["Content-Type"] = DEFAULT_HEADER
-        res = self.make_dys_request("GET", url, headers=headers)
-        dir_list = json.loads(res.text)
+
+        def load():
+            res = self.make_dys_request("GET", url, headers=headers, endpoint="DIR_STRUCTURE")
+            return self.json_loads(res.content)
+
+        dir_list = self._coalesced(("DIR_STRUCTURE", folder_cid, cont_group.name, _from, _to), load)
+        if typed:
+            return [DirectoryEntry.from_dict(entry) for entry in dir_list]
         return dir_list
 
+    def iter_dir_structure(self, folder_cid: str, cont_group: Container = Container.DIRECTORY,
+                           page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = True, typed: bool = False):
+        """
+        Iterate over every entry of a directory regardless of its size, paging with get_dir_structure.
+        While a page is being consumed the next one is fetched in the background.
+        :param folder_cid: Directory Cid
+        :param cont_group: Container type defaults to DIRECTORY
+        :param page_size: Number of entries requested per page, at most 10000
+        :param prefetch: Fetch the next page while the current page is consumed
+        :param typed: Yield compact DirectoryEntry objects instead of dicts
+        :return: Generator of dicts. Each dict refers the basic information of a document.
+        """
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}!")
+
+        def fetch(_from):
+            return self.get_dir_structure(folder_cid, cont_group=cont_group, _from=_from, _to=page_size, typed=typed)
+
+        if not prefetch:
+            _from = 0
+            while True:
+                page = fetch(_from)
+                yield from page
+                if len(page) < page_size:
+                    return
+                _from += page_size
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            _from = 0
+            future = executor.submit(fetch, _from)
+            while True:
+                page = future.result()
+                if len(page) < page_size:
+                    yield from page
+                    return
+                _from += page_size
+                future = executor.submit(fetch, _from)
+                yield from page
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def get_doc_metadata(self, doc_cid: str):
         """
         Get Metadata of a Document
         :param doc_cid: Document Cid
         :return: Returns a dict that contains document metadata
         """
+        return self._cached("GET_DOC_META", doc_cid, lambda: self._get_doc_metadata(doc_cid))
+
+    def _get_doc_metadata(self, doc_cid: str):
         url = self.get_url("GET_DOC_META").format(cid=doc_cid)
         headers = self.HEADERS.copy()
         headers["Content-Type"] = DEFAULT_HEADER
-        res = json.loads(self.make_dys_request("GET", url, headers=headers).text)
+        res = self.json_loads(
+            self.make_dys_request("GET", url, headers=headers, endpoint="GET_DOC_META").content)
         metadata = res["varValues"]
         return metadata
 
@@ -216,20 +692,56 @@ class DYSManager:
             "Content-Type": f"{DEFAULT_HEADER};charset=UTF-8",
             "Authorization": "Bearer " + self.TOKEN,
         }
-        res = self.make_dys_request("PUT", url, headers=headers, data=payload)
+        try:
+            res = self.make_dys_request("PUT", url, headers=headers, data=payload, endpoint="UPDATE_DOC_META")
+        finally:
+            self._invalidate(doc_cid)
         return res
 
-    def get_document_without_content(self, doc_cid: str):
+    def update_metadata_bulk(self, doc_cids: Iterable, transform: Callable, doc_type_id,
+                             max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Read-modify-write the metadata of many documents concurrently.
+        Each document's metadata is fetched, passed to transform and written back only if it changed.
+        The metadata is always read from DYS, never from the cache, so changes of other writers are not reverted.
+        :param doc_cids: Iterable of document Cids, consumed lazily
+        :param transform: Callable(doc_cid, metadata) returning the new metadata dict. It may modify metadata
+        in place and return it.
+        :param doc_type_id: Document type id passed to update_metadata, or a Callable(doc_cid) returning it
+        :param max_workers: Number of documents processed in parallel
+        :return: Generator of :class:`BulkResult` in completion order. item is the Cid, result is True if the
+        metadata was updated and False if the transform left it unchanged, error is the raised exception.
+        """
+        def read_modify_write(doc_cid):
+            metadata = self._coalesced(("GET_DOC_META", doc_cid), lambda: self._get_doc_metadata(doc_cid))
+            original = copy.deepcopy(metadata)
+            new_metadata = transform(doc_cid, metadata)
+            if new_metadata == original:
+                return False
+            type_id = doc_type_id(doc_cid) if callable(doc_type_id) else doc_type_id
+            self.update_metadata(doc_cid, new_metadata, type_id)
+            return True
+
+        return bounded_map(read_modify_write, doc_cids, max_workers=max_workers)
+
+    def get_document_without_content(self, doc_cid: str, typed: bool = False):
         """
         Get document information and details from DYS. (Not Document Content!)
         :param doc_cid: Document Cid
+        :param typed: Return a compact DocumentInfo object instead of a dict
         :return: dict: Document details
         """
+        if typed:
+            return DocumentInfo.from_dict(
+                self._cached("GET_DOC_INFO", doc_cid, lambda: self._get_document_without_content(doc_cid)))
+        return self._cached("GET_DOC_INFO", doc_cid, lambda: self._get_document_without_content(doc_cid))
+
+    def _get_document_without_content(self, doc_cid: str):
         url = self.get_url("GET_DOC_INFO").format(cid=doc_cid)
         headers = self.HEADERS.copy()
         headers["Content-Type"] = DEFAULT_HEADER
-        res = self.make_dys_request("GET", url, headers=headers)
-        document = json.loads(res.text)
+        res = self.make_dys_request("GET", url, headers=headers, endpoint="GET_DOC_INFO")
+        document = self.json_loads(res.content)
         return document
 
     def get_external_share(self, doc_cid: str, hide_name: bool = True) -> list:
@@ -239,12 +751,19 @@ class DYSManager:
         :param hide_name: bool: Hide document name on external share.
         :return: External share url string
         """
+        value = self._get_external_share_items(doc_cid)
+        return list(map(lambda link: link + "&hideName={}".format(hide_name), (item['shareLink'] for item in value)))
+
+    def _get_external_share_items(self, doc_cid: str) -> list:
         url = self.get_url("EXTERNAL_SHARE").format(cid=doc_cid)
         headers = self.HEADERS.copy()
         headers["Content-Type"] = f"{DEFAULT_HEADER};charset=UTF-8"
-        response = self.make_dys_request("GET", url, headers=headers)
-        value = json.loads(response.text)
-        return list(map(lambda link: link + "&hideName={}".format(hide_name), (item['shareLink'] for item in value)))
+
+        def load():
+            response = self.make_dys_request("GET", url, headers=headers, endpoint="EXTERNAL_SHARE")
+            return self.json_loads(response.content)
+
+        return self._coalesced(("EXTERNAL_SHARE", doc_cid), load)
 
     def generate_external_share(self, doc_cid: str, hide_name: bool = True,
                                 role_id_list: list = [],
@@ -280,8 +799,11 @@ class DYSManager:
         if verification_type is VerificationType.IDM:
             payload.update({"idmExternalShare": "true"})
         payload = json.dumps(payload)
-        response = self.make_dys_request("POST", url, headers=headers, data=payload)
-        value = json.loads(response.text)
+        try:
+            response = self.make_dys_request("POST", url, headers=headers, data=payload, endpoint="EXTERNAL_SHARE")
+        finally:
+            self._forget(("EXTERNAL_SHARE", doc_cid))
+        value = self.json_loads(response.content)
         external_url = value["externalShareMailLinkMap"][
                            next(iter(value["externalShareMailLinkMap"]))] + "&hideName={}".format(hide_name)
         return external_url
@@ -296,25 +818,198 @@ class DYSManager:
         url = self.get_url("LINK_EXTERNAL_SHARE").format(cid=doc_cid)
         headers = self.HEADERS.copy()
         headers["Content-Type"] = f"{DEFAULT_HEADER};charset=UTF-8"
-        response = self.make_dys_request("POST", url, headers=headers)
-        value = json.loads(response.text)
+        try:
+            response = self.make_dys_request("POST", url, headers=headers, endpoint="LINK_EXTERNAL_SHARE")
+        finally:
+            self._forget(("EXTERNAL_SHARE", doc_cid))
+        value = self.json_loads(response.content)
         external_url = value["externalShareMailLinkMap"][
                            next(iter(value["externalShareMailLinkMap"]))] + "&hideName={}".format(hide_name)
         return external_url
 
-    def get_document_content(self, doc_cid: str) -> str:
+    def resolve_external_share(self, doc_cid: str, hide_name: bool = True, role_id_list: list = None,
+                               disposable: bool = False, download_disabled: bool = False,
+                               verification_type=VerificationType.NONE, public_link: bool = False) -> str:
+        """
+        Return an external share url for a document, reusing an existing share with the same options and creating
+        one only when none exists. Results are cached per document and options in share_cache.
+        Disposable shares are single use, so they are always created and never cached.
+        :param doc_cid: Document Cid
+        :param hide_name: bool: Hide document name on external share.
+        :param role_id_list: See generate_external_share
+        :param disposable: See generate_external_share
+        :param download_disabled: See generate_external_share
+        :param verification_type: See generate_external_share
+        :param public_link: Create missing shares with generate_link_external_share instead of
+        generate_external_share
+        :return: External share url string
+        """
+        role_id_list = role_id_list or []
+        if disposable:
+            return self.generate_external_share(doc_cid, hide_name, role_id_list, disposable, download_disabled,
+                                                verification_type)
+        options = (hide_name, tuple(role_id_list), download_disabled, verification_type.name, public_link)
+        with self._share_locks[hash(doc_cid) % SHARE_LOCK_STRIPES]:
+            links = self.share_cache.get(doc_cid)
+            if links is not None and options in links:
+                return links[options]
+            link = None
+            if not role_id_list:
+                for item in self._get_external_share_items(doc_cid):
+                    if _share_matches(item, download_disabled, verification_type):
+                        link = item["shareLink"] + "&hideName={}".format(hide_name)
+                        break
+            if link is None and public_link:
+                link = self.generate_link_external_share(doc_cid, hide_name)
+            elif link is None:
+                link = self.generate_external_share(doc_cid, hide_name, role_id_list, disposable, download_disabled,
+                                                    verification_type)
+            links = dict(links or {})
+            links[options] = link
+            self.share_cache.set(doc_cid, links)
+            return link
+
+    def resolve_external_shares(self, doc_cids: Iterable, max_workers: int = DEFAULT_MAX_WORKERS, **options):
+        """
+        Resolve external share urls of many documents concurrently. See resolve_external_share.
+        :param doc_cids: Iterable of document Cids, consumed lazily
+        :param max_workers: Number of documents processed in parallel
+        :param options: resolve_external_share options
+        :return: Generator of :class:`BulkResult`. item is the Cid, result the share url.
+        """
+        return bounded_map(lambda doc_cid: self.resolve_external_share(doc_cid, **options), doc_cids,
+                           max_workers=max_workers)
+
+    def get_document_content(self, doc_cid: str, stream: bool = False, headers: dict = None) -> requests.Response:
         """
         Get content of a document from DYS.
         :param doc_cid: Document Cid
-        :return: str: Document content
+        :param stream: If True, the body is not downloaded until it is read from the response,
+        e.g. with ``response.iter_content``. The response must be closed by the caller.
+        :param headers: (Optional) Extra request headers. Ex: {"Range": "bytes=100-"}
+        :return: :class:`Response <Response>` object
         """
         url = self.get_url("DOC_CONTENT").format(cid=doc_cid)
-        headers = self.HEADERS.copy()
-        headers["Content-Type"] = DEFAULT_HEADER
-        response = self.make_dys_request("GET", url, headers=headers)
+        request_headers = self.HEADERS.copy()
+        request_headers["Content-Type"] = DEFAULT_HEADER
+        if headers:
+            request_headers.update(headers)
+        response = self.make_dys_request("GET", url, headers=request_headers, stream=stream, endpoint="DOC_CONTENT")
 
         return response
 
+    def iter_document_content(self, doc_cid: str, chunk_size: int = DEFAULT_CHUNK_SIZE, offset: int = 0):
+        """
+        Stream content of a document from DYS in chunks, holding at most one chunk in memory.
+        :param doc_cid: Document Cid
+        :param chunk_size: Size of yielded chunks in bytes
+        :param offset: Start streaming from this byte. Uses an HTTP Range request; if DYS ignores the range,
+        the leading bytes are read and discarded.
+        :return: Generator of bytes
+        """
+        response = self._open_content_stream(doc_cid, offset)
+        try:
+            skip = offset if response.status_code != 206 else 0
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+                    chunk = chunk[skip:]
+                    skip = 0
+                yield chunk
+        finally:
+            response.close()
+
+    def download_document(self, doc_cid: str, destination, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          resume: bool = True, max_resumes: int = 3) -> int:
+        """
+        Download content of a document to a file with constant memory.
+        A path destination is written to "<destination>.part" and renamed when the download is complete, so an
+        existing destination is only replaced by a complete copy.
+        :param doc_cid: Document Cid
+        :param destination: File path or a writable binary file object
+        :param chunk_size: Size of chunks written to the destination in bytes
+        :param resume: Continue a ".part" file left by an interrupted download with an HTTP Range request.
+        The range is conditional on the ETag or Last-Modified of the response that started the file, so a
+        document that changed meanwhile is downloaded again from the start. Parts without either are discarded.
+        :param max_resumes: Number of times an interrupted transfer to a path is resumed automatically
+        :return: Size of the downloaded document in bytes
+        """
+        if not isinstance(destination, (str, os.PathLike)):
+            written = 0
+            for chunk in self.iter_document_content(doc_cid, chunk_size=chunk_size):
+                destination.write(chunk)
+                written += len(chunk)
+            return written
+
+        part_path = os.fspath(destination) + PART_SUFFIX
+        validator_path = part_path + VALIDATOR_SUFFIX
+        attempt = 0
+        while True:
+            try:
+                size = self._download_to_part(doc_cid, part_path, validator_path, chunk_size, resume)
+                break
+            except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError):
+                if attempt >= max_resumes:
+                    raise
+                attempt += 1
+                resume = True
+                logging.warning({'doc_cid': doc_cid, 'resume_attempt': attempt})
+        os.replace(part_path, destination)
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+        return size
+
+    def _download_to_part(self, doc_cid: str, part_path: str, validator_path: str, chunk_size: int,
+                          resume: bool) -> int:
+        offset, validator = 0, None
+        if resume and os.path.exists(part_path) and os.path.exists(validator_path):
+            with open(validator_path) as file:
+                validator = file.read()
+            offset = os.path.getsize(part_path)
+        headers = None
+        if offset:
+            # The last byte already written is requested again, so a complete part is answered with 206 rather
+            # than 416 and the response proves the server applied the range
+            headers = {"Range": f"bytes={offset - 1}-", "If-Range": validator}
+        try:
+            response = self.get_document_content(doc_cid, stream=True, headers=headers)
+        except dys_exc.DysHttpException as e:
+            if offset and e.status_code == 416:
+                return self._download_to_part(doc_cid, part_path, validator_path, chunk_size, resume=False)
+            raise
+        with response:
+            content_range = _parse_content_range(response.headers.get("Content-Range"))
+            if offset and (response.status_code != 206 or content_range is None or
+                           content_range[0] != offset - 1):
+                # The document changed or the range was not applied, the part is rewritten from the start
+                offset = 0
+            if not offset:
+                validator = _range_validator(response)
+                if validator is None:
+                    if os.path.exists(validator_path):
+                        os.remove(validator_path)
+                else:
+                    with open(validator_path, "w") as file:
+                        file.write(validator)
+            skip = 1 if offset else 0
+            with open(part_path, "r+b" if offset else "wb") as file:
+                file.seek(offset)
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if skip:
+                        chunk, skip = chunk[skip:], 0
+                    file.write(chunk)
+                size = file.tell()
+        total = content_range[1] if offset and content_range else None
+        if total is not None and size != total:
+            raise requests.exceptions.ChunkedEncodingError(f"Received {size} of {total} bytes of {doc_cid}")
+        return size
+
+    def _open_content_stream(self, doc_cid: str, offset: int = 0) -> requests.Response:
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        return self.get_document_content(doc_cid, stream=True, headers=headers)
+
     def copy_document(self, doc_cid: str, parent_folder_cid: str = None, x_lang: str = None,
                       add_copy_of_prefix: bool = False):
         """
@@ -334,7 +1029,12 @@ class DYSManager:
         params = {"addCopyOfPrefix": add_copy_of_prefix}
         if parent_folder_cid:
             params.update({"targetFolderCid": parent_folder_cid})
-        res = self.make_dys_request("POST", url, headers, params=params)
+        try:
+            res = self.make_dys_request("POST", url, headers, params=params, endpoint="COPY")
+        finally:
+            self._invalidate(doc_cid)
+            # Without a target folder the copy goes to the root, whose cid is not known here
+            self._forget_listings(parent_folder_cid)
         return res
 
     def rename_document(self, doc_cid: str, name: str):
@@ -346,7 +1046,11 @@ class DYSManager:
         """
         end_point = self.get_url("RENAME").format(cid=doc_cid)
         url = end_point + "?fileName=" + name
-        res = self.make_dys_request("POST", url)
+        try:
+            res = self.make_dys_request("POST", url, endpoint="RENAME")
+        finally:
+            self._invalidate(doc_cid)
+            self._forget_listings()
         return res
 
     def delete(self, cid: str) -> requests.Response:
@@ -356,7 +1060,11 @@ class DYSManager:
         :return: Request Response
         """
         url = self.get_url("DELETE").format(cid=cid)
-        res = self.make_dys_request(method="DELETE", url=url)
+        try:
+            res = self.make_dys_request(method="DELETE", url=url, endpoint="DELETE")
+        finally:
+            self._invalidate(cid, shares=True)
+            self._forget_listings()
         return res
 
     def delete_permanently(self, cid: str) -> requests.Response:
@@ -366,19 +1074,55 @@ class DYSManager:
         :return: Request Response
         """
         url = self.get_url("DELETE_PERMA").format(cid=cid)
-        res = self.make_dys_request(method="DELETE", url=url)
+        try:
+            res = self.make_dys_request(method="DELETE", url=url, endpoint="DELETE_PERMA")
+        finally:
+            self._invalidate(cid, shares=True)
+            self._forget_listings()
         return res
 
-    def clear_directory(self, cid: str) -> str:
+    def clear_directory(self, cid: str, permanently: bool = False, max_workers: int = DEFAULT_MAX_WORKERS,
+                        cont_group: Container = Container.DIRECTORY) -> str:
         """
         Delete all files and subfolders inside a directory.
         :param cid: Dys Cid
+        :param permanently: Delete items permanently instead of sending them to recycle
+        :param max_workers: Number of parallel deletes
+        :param cont_group: Container type of the directory
         :return: Cid of folder
+        :exception: DysClearDirectoryItemDeleteException if any item could not be deleted. Its report
+        attribute holds the deleted and failed cids, the first failure is chained as its cause.
         """
-        dir_list = self.get_dir_structure(folder_cid=cid)
-        for item in dir_list:
-            try:
-                self.delete(item["cid"])
-            except Exception:
-                raise dys_exc.DysClearDirectoryItemDeleteException()
+        report = self.clear_directory_report(cid, permanently=permanently, max_workers=max_workers,
+                                             cont_group=cont_group)
+        if not report.ok:
+            raise dys_exc.DysClearDirectoryItemDeleteException(
+                message=f"Clear Directory Item Delete Exception, {len(report.failed)} items failed",
+                report=report) from next(iter(report.failed.values()))
         return cid
+
+    def clear_directory_report(self, cid: str, permanently: bool = False, max_workers: int = DEFAULT_MAX_WORKERS,
+                               cont_group: Container = Container.DIRECTORY,
+                               page_size: int = DEFAULT_PAGE_SIZE) -> ClearDirectoryReport:
+        """
+        Delete all files and subfolders inside a directory concurrently and report the outcome of every item.
+        The whole directory is listed before deleting, so deletes do not shift listing pages. Deleting a
+        subfolder removes its content as well.
+        :param cid: Dys Cid
+        :param permanently: Delete items permanently instead of sending them to recycle
+        :param max_workers: Number of parallel deletes
+        :param cont_group: Container type of the directory
+        :param page_size: Page size of the directory listing
+        :return: :class:`ClearDirectoryReport`
+        """
+        item_cids = [item["cid"] for item in self.iter_dir_structure(cid, cont_group=cont_group,
+                                                                      page_size=page_size)]
+        delete = self.delete_permanently if permanently else self.delete
+        report = ClearDirectoryReport(cid)
+        for res in bounded_map(delete, item_cids, max_workers=max_workers):
+            if res.error is None:
+                report.deleted.append(res.item)
+            else:
+                logging.error({'clear_directory': cid, 'cid': res.item, 'error': repr(res.error)})
+                report.failed[res.item] = res.error
+        return report
@@ -5,7 +5,10 @@ class DysHttpException(Exception):
     Attributes:
         status_code -- Http status code
         message -- explanation of the error
+        response -- Dys response that caused the error, if any
     """
+    response = None
+
     def __init__(self, status_code, message="Dys Http Exception"):
         self.status_code = status_code
         self.message = f"{message}, status code {status_code}!"
@@ -53,9 +56,21 @@ class DysServiceTemporarilyUnavailable(DysHttpException):
 
 
 class DysClearDirectoryItemDeleteException(DysHttpException):
-    """Raised when Dys Internal Server Error occurs with error code 500"""
-    def __init__(self, message="Clear Directory Item Delete Exception"):
+    """
+    Raised when items of a directory cannot be deleted while clearing it
+    Attributes:
+        report -- ClearDirectoryReport with deleted cids and failed cids mapped to their exceptions
+    """
+    def __init__(self, message="Clear Directory Item Delete Exception", report=None):
         self.status_code = 500
         self.message = message
+        self.report = report
         super().__init__(status_code=self.status_code, message=message)
 
+
+class DysCircuitOpenError(DysHttpException):
+    """Raised without contacting Dys while the circuit breaker is open after repeated server failures"""
+    def __init__(self, message="Dys Circuit Breaker Is Open!"):
+        self.status_code = 503
+        self.message = message
+        super().__init__(status_code=self.status_code, message=message)
@@ -0,0 +1,31 @@
+"""
+JSON decoding of DYS response bodies.
+
+Bodies are parsed from bytes, skipping the str decoding step of ``response.text``. orjson is used when it is
+installed (``pip install dys-connector[fast]``), the standard library otherwise.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def std_loads(data):
+    """
+    Decode with the standard library. Accepts UTF-8 bytes or str.
+    """
+    return json.loads(data)
+
+
+def orjson_loads(data):
+    """
+    Decode with orjson. Raises ImportError if orjson is not installed.
+    """
+    if orjson is None:
+        raise ImportError("orjson is not installed")
+    return orjson.loads(data)
+
+
+loads = orjson_loads if orjson is not None else std_loads
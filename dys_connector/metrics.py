@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class MetricsHook:
+    """
+    Receives one record per DYS request attempt. This base class discards everything and is the default of
+    DYSManager; as its enabled attribute is False the manager does not even measure requests.
+    Subclass it and set enabled to True to export metrics elsewhere.
+    """
+    enabled = False
+
+    def record(self, endpoint: str, method: str, status_code: int, latency: float, bytes_out: int, bytes_in: int):
+        """
+        :param endpoint: ENDPOINTS key of the request, None if unknown
+        :param method: Http method
+        :param status_code: Http status code, None if no response was received
+        :param latency: Seconds until the response headers were received
+        :param bytes_out: Request body size
+        :param bytes_in: Response body size as reported by DYS or read so far
+        """
+        pass
+
+
+NOOP_METRICS = MetricsHook()
+
+
+class _EndpointStats:
+    __slots__ = ("count", "errors", "status_codes", "bytes_out", "bytes_in", "latency_sum", "latency_max",
+                 "histogram")
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.errors = 0
+        self.status_codes = Counter()
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.histogram = [0] * bucket_count
+
+
+class InMemoryMetrics(MetricsHook):
+    """
+    Thread-safe per endpoint request counters, status codes, transferred bytes and latency histograms.
+
+        metrics = InMemoryMetrics()
+        manager = DYSManager(dys_base_url, idm_token, metrics=metrics)
+        ...
+        print(metrics.snapshot()["GET_DOC_META"]["latency"]["p99"])
+    """
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, method: str, status_code: int, latency: float, bytes_out: int, bytes_in: int):
+        key = endpoint or method
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats(len(self.buckets) + 1)
+            stats.count += 1
+            if status_code is None or status_code >= 400:
+                stats.errors += 1
+            stats.status_codes[status_code or 0] += 1
+            stats.bytes_out += bytes_out
+            stats.bytes_in += bytes_in
+            stats.latency_sum += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            stats.histogram[bisect_left(self.buckets, latency)] += 1
+
+    def snapshot(self) -> dict:
+        """
+        :return: dict of ENDPOINTS keys to their counters. Status code 0 counts attempts without a response.
+        Percentiles are upper bounds of the histogram bucket they fall in.
+        """
+        with self._lock:
+            return {key: self._stats_dict(stats) for key, stats in self._stats.items()}
+
+    def _stats_dict(self, stats: _EndpointStats) -> dict:
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "count": stats.count,
+            "errors": stats.errors,
+            "status_codes": dict(stats.status_codes),
+            "bytes_out": stats.bytes_out,
+            "bytes_in": stats.bytes_in,
+            "latency": {
+                "mean": stats.latency_sum / stats.count if stats.count else 0.0,
+                "max": stats.latency_max,
+                "p50": self._percentile(stats, 0.5),
+                "p99": self._percentile(stats, 0.99),
+                "histogram": dict(zip(bounds, stats.histogram)),
+            },
+        }
+
+    def _percentile(self, stats: _EndpointStats, quantile: float) -> float:
+        rank = quantile * stats.count
+        seen = 0
+        for index, count in enumerate(stats.histogram):
+            seen += count
+            if count and seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else stats.latency_max
+        return 0.0
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def export_json(self, file):
+        """
+        Write a snapshot with its timestamp as a JSON line.
+        :param file: Writable text file object
+        """
+        file.write(json.dumps({"timestamp": time.time(), "endpoints": self.snapshot()}) + "\n")
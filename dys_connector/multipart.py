@@ -0,0 +1,153 @@
+import mmap
+import os
+import uuid
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+class MultipartStream:
+    """
+    A read-only, seekable multipart/form-data body that is generated while it is sent.
+
+    File parts are read from their source in blocks and buffers are sliced without copying, so the document is
+    never materialized in memory. The total length is known up front, so requests sends a Content-Length
+    header instead of a chunked body.
+
+    Attributes
+    ----------
+    boundary : str
+        Multipart boundary
+    content_type: str
+        Value of the Content-Type header of the request
+    """
+
+    def __init__(self, fields: list, files: list, boundary: str = None):
+        """
+        :param fields: List of (name, value) form fields. Values are str or bytes.
+        :param files: List of (name, filename, source, mime_type) file parts. Source is a file path, a readable
+        binary file object or a bytes-like object such as bytes, memoryview or mmap.
+        :param boundary: (Optional) Multipart boundary
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._segments = []
+        self._opened = []
+        for name, value in fields:
+            if isinstance(value, str):
+                value = value.encode("utf-8")
+            self._add_bytes(self._part_header(name) + b"\r\n" + value + b"\r\n")
+        for name, filename, source, mime_type in files:
+            header = self._part_header(name, filename) + f"Content-Type: {mime_type}\r\n".encode("utf-8") + b"\r\n"
+            self._add_bytes(header)
+            self._add_source(source)
+            self._add_bytes(b"\r\n")
+        self._add_bytes(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self._length = sum(segment[2] for segment in self._segments)
+        self._index = 0
+        self._offset = 0
+        self._position = 0
+
+    def _part_header(self, name: str, filename: str = None) -> bytes:
+        disposition = f'form-data; name="{_quote(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{_quote(filename)}"'
+        return f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n".encode("utf-8")
+
+    def _add_bytes(self, data: bytes):
+        self._segments.append((memoryview(data), 0, len(data)))
+
+    def _add_source(self, source):
+        if isinstance(source, (str, os.PathLike)):
+            file = open(source, "rb")
+            self._opened.append(file)
+            self._segments.append((file, 0, os.fstat(file.fileno()).st_size))
+        elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            view = memoryview(source).cast("B")
+            self._segments.append((view, 0, len(view)))
+        else:
+            start = source.tell()
+            source.seek(0, os.SEEK_END)
+            size = source.tell() - start
+            source.seek(start)
+            self._segments.append((source, start, size))
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return f"<MultipartStream {self._length} bytes>"
+
+    def __iter__(self):
+        while True:
+            block = self.read(DEFAULT_BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+    def read(self, size: int = -1):
+        """
+        Read up to size bytes of the body. Reads at most from a single part, so fewer bytes may be returned.
+        :param size: Number of bytes to read, -1 reads the rest of the body into memory
+        :return: bytes or memoryview, empty at the end of the body
+        """
+        if size is None or size < 0:
+            return b"".join(bytes(block) for block in iter(lambda: self.read(DEFAULT_BLOCK_SIZE), b""))
+        while self._index < len(self._segments):
+            source, start, length = self._segments[self._index]
+            remaining = length - self._offset
+            if remaining <= 0:
+                self._index += 1
+                self._offset = 0
+                continue
+            count = min(size, remaining)
+            if isinstance(source, memoryview):
+                block = source[self._offset:self._offset + count]
+            else:
+                source.seek(start + self._offset)
+                block = source.read(count)
+                if not block:
+                    raise IOError("Upload source is shorter than its reported size")
+            self._offset += len(block)
+            self._position += len(block)
+            return block
+        return b""
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, position: int, whence: int = os.SEEK_SET) -> int:
+        """
+        Move to an absolute position of the body, e.g. seek(0) to send it again.
+        """
+        if whence == os.SEEK_CUR:
+            position += self._position
+        elif whence == os.SEEK_END:
+            position += self._length
+        position = max(0, min(position, self._length))
+        self._position = position
+        self._index = 0
+        for _, _, length in self._segments:
+            if position < length:
+                break
+            position -= length
+            self._index += 1
+        self._offset = position
+        return self._position
+
+    def close(self):
+        """
+        Close files opened from paths.
+        """
+        for file in self._opened:
+            file.close()
+        self._opened = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
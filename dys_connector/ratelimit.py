@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Tokens are refilled continuously at rate per second up to burst.
+
+    Attributes
+    ----------
+    rate : float
+        Tokens added per second
+    burst: float
+        Bucket capacity, the number of requests that may be sent at once after an idle period
+    """
+
+    def __init__(self, rate: float, burst: float = None, timer=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("Rate must be positive!")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = timer()
+        self._timer = timer
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """
+        Take tokens from the bucket, waiting until enough are available.
+        """
+        while True:
+            with self._lock:
+                now = self._timer()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    Limits the number of in-flight requests with an AIMD (additive increase, multiplicative decrease) limit.
+
+    The limit grows by one after every limit successful requests and is multiplied by decrease_factor when a
+    request fails with a server error or its latency exceeds latency_threshold.
+
+    Attributes
+    ----------
+    limit : float
+        Currently allowed number of in-flight requests
+    """
+
+    def __init__(self, initial: int = 16, min_limit: int = 1, max_limit: int = 256, decrease_factor: float = 0.7,
+                 latency_threshold: float = None):
+        """
+        :param initial: Initial concurrency limit
+        :param min_limit: Lower bound of the limit
+        :param max_limit: Upper bound of the limit
+        :param decrease_factor: Factor applied to the limit on an error or a slow response
+        :param latency_threshold: (Optional) Seconds above which a response counts as slow
+        """
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, error: bool):
+        """
+        Free a slot and adapt the limit to the outcome of the request.
+        :param latency: Seconds the request took
+        :param error: True if the request failed because DYS is overloaded
+        """
+        with self._condition:
+            self._in_flight -= 1
+            slow = self.latency_threshold is not None and latency > self.latency_threshold
+            if error or slow:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class RateLimiter:
+    """
+    Client side rate limiter of DYS requests. One instance can be shared by threads and by several DYSManager
+    instances to bound their total load on a tenant.
+
+        limiter = RateLimiter(rate=50, endpoint_rates={"UPLOAD_DOCUMENT": 5}, adaptive=True)
+        manager = DYSManager(dys_base_url, idm_token, rate_limiter=limiter)
+
+    Attributes
+    ----------
+    bucket : TokenBucket
+        Global bucket, None if only endpoint limits apply
+    endpoint_buckets: dict
+        ENDPOINTS keys mapped to their own buckets, applied in addition to the global one
+    concurrency: AdaptiveConcurrency
+        Adaptive in-flight limit, None unless adaptive is enabled
+    """
+
+    def __init__(self, rate: float = None, burst: float = None, endpoint_rates: dict = None, adaptive: bool = False,
+                 concurrency: AdaptiveConcurrency = None):
+        """
+        :param rate: (Optional) Global requests per second
+        :param burst: (Optional) Global bucket capacity, defaults to rate
+        :param endpoint_rates: (Optional) ENDPOINTS keys mapped to requests per second or to (rate, burst) tuples
+        :param adaptive: Enable adaptive concurrency with default settings
+        :param concurrency: (Optional) Adaptive concurrency with custom settings, implies adaptive
+        """
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.endpoint_buckets = {}
+        for endpoint, limit in (endpoint_rates or {}).items():
+            rate_, burst_ = limit if isinstance(limit, tuple) else (limit, None)
+            self.endpoint_buckets[endpoint] = TokenBucket(rate_, burst_)
+        self.concurrency = concurrency or (AdaptiveConcurrency() if adaptive else None)
+
+    @contextmanager
+    def limit(self, endpoint: str = None):
+        """
+        Wait for permission to send a request and hold a concurrency slot while it runs.
+        The block sets ``slot.error = True`` when DYS reports overload so the adaptive limit can shrink.
+        :param endpoint: ENDPOINTS key of the request
+        """
+        if self.bucket:
+            self.bucket.acquire()
+        endpoint_bucket = self.endpoint_buckets.get(endpoint)
+        if endpoint_bucket:
+            endpoint_bucket.acquire()
+        if self.concurrency is None:
+            yield _Slot()
+            return
+        self.concurrency.acquire()
+        slot = _Slot()
+        start = time.monotonic()
+        try:
+            yield slot
+        finally:
+            self.concurrency.release(time.monotonic() - start, slot.error)
+
+
+class _Slot:
+    __slots__ = ("error",)
+
+    def __init__(self):
+        self.error = False
@@ -0,0 +1,183 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+import requests
+
+import dys_connector.exceptions as dys_exc
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+ALL_METHODS = IDEMPOTENT_METHODS | {"POST", "PATCH"}
+TRANSIENT_STATUS_CODES = frozenset({502, 503, 504})
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class RetryPolicy:
+    """
+    Decides which failed DYS requests are retried and how long to wait before the next attempt.
+
+    Waits grow exponentially with full jitter: a random time between 0 and
+    min(max_backoff, backoff_factor * 2 ** attempt). A Retry-After header of the response is honored when it asks
+    for a longer wait.
+
+    Attributes
+    ----------
+    total : int
+        Maximum number of retries, 0 disables retrying
+    backoff_factor: float
+        Base wait in seconds
+    max_backoff: float
+        Upper bound of a single wait in seconds
+    status_codes: frozenset
+        Http status codes that are retried
+    methods: frozenset
+        Http methods that are retried. Only idempotent methods by default, add "POST" to opt in for uploads.
+    """
+
+    def __init__(self, total: int = 3, backoff_factor: float = 0.5, max_backoff: float = 30,
+                 status_codes=TRANSIENT_STATUS_CODES, methods=IDEMPOTENT_METHODS, jitter: bool = True,
+                 respect_retry_after: bool = True, retry_connection_errors: bool = True):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_codes = frozenset(status_codes)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+        self.retry_connection_errors = retry_connection_errors
+
+    def is_retryable(self, method: str, error: Exception) -> bool:
+        if method.upper() not in self.methods:
+            return False
+        if isinstance(error, dys_exc.DysHttpException):
+            return error.status_code in self.status_codes
+        return self.retry_connection_errors and isinstance(error, CONNECTION_ERRORS)
+
+    def backoff(self, attempt: int, error: Exception = None) -> float:
+        """
+        :param attempt: Number of retries made so far
+        :param error: Exception of the failed attempt
+        :return: Seconds to wait before the next attempt
+        """
+        wait = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        if self.jitter:
+            wait = random.uniform(0, wait)
+        if self.respect_retry_after:
+            retry_after = get_retry_after(error)
+            if retry_after is not None:
+                wait = max(wait, min(retry_after, self.max_backoff))
+        return wait
+
+
+NO_RETRY = RetryPolicy(total=0)
+
+
+def get_retry_after(error: Exception):
+    """
+    :param error: Exception raised for a DYS response
+    :return: Seconds requested by the Retry-After header of the response or None
+    """
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_server_failure(error: Exception) -> bool:
+    """
+    :return: True if the error means DYS is unhealthy: a 5xx response or a connection failure
+    """
+    if isinstance(error, dys_exc.DysHttpException):
+        return error.status_code >= 500
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while DYS keeps failing.
+
+    After failure_threshold consecutive server failures the circuit opens and requests raise DysCircuitOpenError
+    without reaching DYS. Once recovery_timeout has passed, one caller runs the health check; the circuit closes
+    when it succeeds and stays open for another recovery_timeout otherwise. A breaker can be shared by managers
+    talking to the same DYS.
+
+    Attributes
+    ----------
+    failure_threshold : int
+        Consecutive failures that open the circuit
+    recovery_timeout: float
+        Seconds the circuit stays open before DYS is checked again
+    """
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30,
+                 health_check: Callable[[], bool] = None, timer=time.monotonic):
+        """
+        :param failure_threshold: Consecutive failures that open the circuit
+        :param recovery_timeout: Seconds the circuit stays open before DYS is checked again
+        :param health_check: Callable returning True when DYS is healthy. DYSManager uses check_state() == "FINE"
+        when it is not set.
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.health_check = health_check
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+
+    def before_request(self, health_check: Callable[[], bool] = None):
+        """
+        Raise DysCircuitOpenError if the circuit is open and DYS has not recovered yet.
+        :param health_check: Fallback health check used when the breaker has none
+        """
+        if self.state == self.CLOSED:
+            return
+        if self._timer() - self._opened_at < self.recovery_timeout or not self._probe_lock.acquire(blocking=False):
+            raise dys_exc.DysCircuitOpenError()
+        try:
+            if self.state == self.CLOSED:
+                return
+            check = self.health_check or health_check
+            try:
+                healthy = check is not None and check()
+            except Exception as e:
+                logging.warning({'circuit_breaker': 'health check failed', 'error': repr(e)})
+                healthy = False
+            with self._lock:
+                if healthy:
+                    self.state = self.CLOSED
+                    self._failures = 0
+                else:
+                    self._opened_at = self._timer()
+            if not healthy:
+                raise dys_exc.DysCircuitOpenError()
+            logging.info({'circuit_breaker': self.CLOSED})
+        finally:
+            self._probe_lock.release()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold and self.state == self.CLOSED:
+                self.state = self.OPEN
+                self._opened_at = self._timer()
+                logging.error({'circuit_breaker': self.OPEN, 'failures': self._failures})
@@ -0,0 +1,78 @@
+import threading
+from typing import Callable, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the function, callers arriving while it
+    runs wait for and share its result or exception. Nothing is kept once the call returns, so a later call
+    always runs again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable) -> Tuple[object, bool]:
+        """
+        :param key: Identifies identical calls
+        :param fn: Called without arguments by the first caller of key
+        :return: (value, shared) tuple. shared is True if the value was given to more than one caller.
+        :exception: Whatever fn raised, for every caller that shared the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+        return call.value, shared
+
+    def forget(self, *keys):
+        """
+        Let later callers of keys start a new call instead of joining one in flight, e.g. after a write made the
+        result of the running call outdated.
+        """
+        with self._lock:
+            for key in keys:
+                self._calls.pop(key, None)
+
+    def forget_if(self, predicate: Callable[[Hashable], bool]):
+        """
+        Forget every call in flight whose key satisfies predicate, see forget.
+        """
+        with self._lock:
+            for key in [key for key in self._calls if predicate(key)]:
+                del self._calls[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from dys_connector.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from dys_connector.dto import KISISEL_BELGE, UploadDocumentDTO
+from dys_connector.dys_api_manager import DEFAULT_CHUNK_SIZE, DYSManager
+
+# SQLite database file of a SyncIndex and the files SQLite keeps next to it
+INDEX_FILE_SUFFIXES = ("", "-journal", "-wal", "-shm")
+
+IndexedDocument = namedtuple("IndexedDocument", ["path", "content_hash", "cid", "metadata_hash", "size", "mtime"])
+
+
+def hash_file(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    :return: sha256 hex digest of the file content, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_metadata(metadata: dict) -> str:
+    return hashlib.sha256(json.dumps(metadata or {}, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class SyncIndex:
+    """
+    Persistent SQLite index of synced documents: relative path, content hash, DYS cid and metadata hash, plus
+    the cids of created folders.
+
+    Attributes
+    ----------
+    db_path : str
+        SQLite database file
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+                "cid TEXT NOT NULL, metadata_hash TEXT NOT NULL, size INTEGER, mtime REAL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS folders (path TEXT PRIMARY KEY, cid TEXT NOT NULL)")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def documents(self) -> dict:
+        """
+        :return: dict of relative paths to :class:`IndexedDocument`
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, content_hash, cid, metadata_hash, size, mtime FROM documents").fetchall()
+        return {row[0]: IndexedDocument(*row) for row in rows}
+
+    def get_document(self, path: str):
+        """
+        :return: :class:`IndexedDocument` of a relative path or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT path, content_hash, cid, metadata_hash, size, mtime FROM documents WHERE path = ?",
+                (path,)).fetchone()
+        return IndexedDocument(*row) if row else None
+
+    def start_run(self):
+        """
+        Start recording the paths seen by a sync run, see unseen_documents.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+            self._connection.execute("DELETE FROM seen")
+
+    def mark_seen(self, path: str):
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR IGNORE INTO seen VALUES (?)", (path,))
+
+    def unseen_documents(self) -> list:
+        """
+        :return: :class:`IndexedDocument` list of the documents whose path was not seen since start_run
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, content_hash, cid, metadata_hash, size, mtime FROM documents "
+                "WHERE path NOT IN (SELECT path FROM seen)").fetchall()
+        return [IndexedDocument(*row) for row in rows]
+
+    def put_document(self, document: IndexedDocument):
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)", tuple(document))
+
+    def remove_document(self, path: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM documents WHERE path = ?", (path,))
+
+    def get_folder(self, path: str):
+        with self._lock:
+            row = self._connection.execute("SELECT cid FROM folders WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def put_folder(self, path: str, cid: str):
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO folders VALUES (?, ?)", (path, cid))
+
+
+class SyncReport:
+    """
+    Result of a sync run. Every list holds relative paths, unless the report was created without keep_paths.
+
+    Attributes
+    ----------
+    counts: dict
+        Number of files per kind: "upload", "metadata", "unchanged" and "delete"
+    uploaded: list
+        New documents and documents whose content changed
+    metadata_updated: list
+        Documents whose metadata alone changed
+    unchanged: list
+        Documents that were skipped
+    deleted: list
+        Documents removed at the source and deleted from DYS
+    failed: dict
+        Relative paths mapped to the raised exception
+    """
+
+    def __init__(self, keep_paths: bool = True):
+        self.keep_paths = keep_paths
+        self.counts = {"upload": 0, "metadata": 0, "unchanged": 0, "delete": 0}
+        self.uploaded = []
+        self.metadata_updated = []
+        self.unchanged = []
+        self.deleted = []
+        self.failed = {}
+
+    def add(self, kind: str, path: str):
+        self.counts[kind] += 1
+        if self.keep_paths:
+            {"upload": self.uploaded, "metadata": self.metadata_updated, "unchanged": self.unchanged,
+             "delete": self.deleted}[kind].append(path)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def __repr__(self):
+        return (f"SyncReport(uploaded={self.counts['upload']}, metadata_updated={self.counts['metadata']}, "
+                f"unchanged={self.counts['unchanged']}, deleted={self.counts['delete']}, failed={len(self.failed)})")
+
+
+def sync_directory(manager: DYSManager, local_dir: str, parent_folder_cid: str, index: SyncIndex,
+                   doc_type_id: str = None, metadata: Callable[[str], dict] = None, extensions=(".html", ".htm"),
+                   delete_removed: bool = False, permanently: bool = False, trust_mtime: bool = True,
+                   max_workers: int = DEFAULT_MAX_WORKERS, mime_type: str = "text/html", hash_processes: int = 0,
+                   progress: Callable[[str, str, int], None] = None, keep_paths: bool = True) -> SyncReport:
+    """
+    Upload only new or changed documents of a local directory tree to a DYS folder.
+    Sub directories are mirrored as DYS folders. A document whose content changed is uploaded again and its previous
+    version is deleted; a document whose metadata alone changed gets update_metadata. The files of index are never
+    uploaded, even when it is kept inside local_dir.
+    Files are hashed and applied in one pass and the index is updated after every file, so an interrupted run
+    loses no finished work and memory does not grow with the size of the tree.
+    :param manager: DYS manager
+    :param local_dir: Local root directory
+    :param parent_folder_cid: DYS folder that mirrors local_dir
+    :param index: Sync index of previous runs for this local_dir and parent_folder_cid
+    :param doc_type_id: (Optional) Document type id of uploaded documents, defaults to Kisisel Belge
+    :param metadata: (Optional) Callable returning the metadata dict of a relative path
+    :param extensions: File extensions to sync, None syncs every file
+    :param delete_removed: Delete documents from DYS whose source file is gone
+    :param permanently: Delete permanently instead of sending to recycle
+    :param trust_mtime: Skip hashing files whose size and modification time match the index
+    :param max_workers: Number of parallel hashes and DYS operations
+    :param mime_type: Mime type of uploaded files, None guesses it from the file name
+    :param hash_processes: Hash files in this many processes instead of the worker threads
+    :param progress: (Optional) Callable(kind, path, size) called in the calling thread for every finished file.
+    kind is "upload", "metadata", "unchanged" or "delete", size is the number of uploaded bytes.
+    :param keep_paths: List the paths of successful files in the report. Only counts are kept otherwise.
+    :return: :class:`SyncReport`
+    """
+    if hash_processes:
+        with ProcessPoolExecutor(max_workers=hash_processes) as pool:
+            return _sync(manager, local_dir, parent_folder_cid, index, doc_type_id, metadata, extensions,
+                         delete_removed, permanently, trust_mtime, max_workers, mime_type,
+                         lambda path: pool.submit(hash_file, path).result(), progress, keep_paths)
+    return _sync(manager, local_dir, parent_folder_cid, index, doc_type_id, metadata, extensions, delete_removed,
+                 permanently, trust_mtime, max_workers, mime_type, hash_file, progress, keep_paths)
+
+
+def _sync(manager, local_dir, parent_folder_cid, index, doc_type_id, metadata, extensions, delete_removed,
+          permanently, trust_mtime, max_workers, mime_type, hasher, progress, keep_paths) -> SyncReport:
+    progress = progress or (lambda kind, path, size: None)
+    report = SyncReport(keep_paths=keep_paths)
+    type_id = doc_type_id or KISISEL_BELGE
+    folder_lock = threading.Lock()
+    index.start_run()
+    # The index may live inside local_dir, e.g. the default journal of dys-transfer run from the source directory
+    index_files = {os.path.realpath(index.db_path + suffix) for suffix in INDEX_FILE_SUFFIXES}
+
+    def files():
+        for entry in _iter_files(local_dir, extensions, index_files):
+            index.mark_seen(entry[0])
+            yield entry
+
+    def sync_file(entry):
+        # Planning and applying run in the same task, so uploads start while later files are still hashed
+        path, full_path, stat = entry
+        previous = index.get_document(path)
+        if previous and trust_mtime and (previous.size, previous.mtime) == (stat.st_size, stat.st_mtime):
+            content_hash = previous.content_hash
+        else:
+            content_hash = hasher(full_path)
+        meta = metadata(path) if metadata else {}
+        if previous is None or previous.content_hash != content_hash:
+            kind = "upload"
+        elif previous.metadata_hash != hash_metadata(meta):
+            kind = "metadata"
+        elif (previous.size, previous.mtime) == (stat.st_size, stat.st_mtime):
+            return "unchanged", None
+        else:
+            return "unchanged", previous._replace(size=stat.st_size, mtime=stat.st_mtime)
+        document = IndexedDocument(path, content_hash, None, hash_metadata(meta), stat.st_size, stat.st_mtime)
+        if kind == "metadata":
+            manager.update_metadata(previous.cid, meta, type_id)
+            return kind, document._replace(cid=previous.cid)
+        # Uploads into the same new folder must not create it twice
+        with folder_lock:
+            folder_cid = _ensure_folder(manager, index, parent_folder_cid, os.path.dirname(path))
+        dto = UploadDocumentDTO(os.path.basename(path), tag_ids=type_id)
+        dto.varValues = {key: value for key, value in meta.items() if value}
+        file_mime_type = mime_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        cid = manager.upload_document(folder_cid, dto, full_path, mime_type=file_mime_type)
+        if previous is not None:
+            try:
+                _delete(manager, previous.cid, permanently)
+            except Exception as e:
+                logging.error({'sync': 'previous version not deleted', 'cid': previous.cid, 'error': repr(e)})
+        return kind, document._replace(cid=cid)
+
+    for res in bounded_map(sync_file, files(), max_workers=max_workers):
+        path, _, stat = res.item
+        if res.error is not None:
+            report.failed[path] = res.error
+            continue
+        kind, document = res.result
+        if document is not None:
+            index.put_document(document)
+        report.add(kind, path)
+        progress(kind, path, stat.st_size if kind == "upload" else 0)
+
+    if delete_removed:
+        for res in bounded_map(lambda document: _delete(manager, document.cid, permanently),
+                               index.unseen_documents(), max_workers=max_workers):
+            if res.error is not None:
+                report.failed[res.item.path] = res.error
+            else:
+                index.remove_document(res.item.path)
+                report.add("delete", res.item.path)
+                progress("delete", res.item.path, 0)
+    return report
+
+
+def _iter_files(local_dir: str, extensions, excluded=frozenset()):
+    excluded_names = {os.path.basename(path) for path in excluded}
+    for root, dirs, files in os.walk(local_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if extensions and not name.lower().endswith(tuple(extensions)):
+                continue
+            full_path = os.path.join(root, name)
+            if name in excluded_names and os.path.realpath(full_path) in excluded:
+                continue
+            path = os.path.relpath(full_path, local_dir).replace(os.sep, "/")
+            yield path, full_path, os.stat(full_path)
+
+
+def _ensure_folder(manager: DYSManager, index: SyncIndex, root_cid: str, path: str) -> str:
+    if not path:
+        return root_cid
+    cid = index.get_folder(path)
+    if cid is None:
+        parent_cid = _ensure_folder(manager, index, root_cid, os.path.dirname(path))
+        cid = manager.post_folder(parent_cid, os.path.basename(path))
+        index.put_folder(path, cid)
+    return cid
+
+
+def _delete(manager: DYSManager, cid: str, permanently: bool):
+    if permanently:
+        manager.delete_permanently(cid)
+    else:
+        manager.delete(cid)
@@ -0,0 +1,469 @@
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable
+
+from dys_connector.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from dys_connector.dto import CopyTreeReport
+from dys_connector.dys_api_manager import DEFAULT_PAGE_SIZE, Container, DYSManager
+
+# Values of a directory structure entry's type fields that denote a container with children
+FOLDER_TYPES = {"FOLDER", "DIRECTORY", "SPACE"}
+
+TreeEntry = namedtuple("TreeEntry", ["cid", "parent", "path", "type"])
+TreeEntry.__doc__ = """
+An entry of a DYS folder hierarchy.
+cid -- Dys Cid of the entry
+parent -- Cid of the containing folder
+path -- Slash separated names from the walked root, e.g. "reports/2023/q1.html"
+type -- Container.DIRECTORY for folders, Container.DOCUMENT otherwise
+"""
+
+
+def is_folder(entry: dict) -> bool:
+    """
+    Decide whether a get_dir_structure entry is a folder.
+    :param entry: Directory structure entry
+    :return: True if the entry can contain other entries
+    """
+    for key in ("type", "documentType", "contentType", "itemType"):
+        if str(entry.get(key, "")).upper() in FOLDER_TYPES:
+            return True
+    return bool(entry.get("folder") or entry.get("isFolder") or entry.get("directory"))
+
+
+def walk_tree(manager: DYSManager, root_cid: str, cont_group: Container = Container.DIRECTORY,
+              max_workers: int = DEFAULT_MAX_WORKERS, page_size: int = DEFAULT_PAGE_SIZE,
+              folder_check: Callable[[dict], bool] = is_folder):
+    """
+    Breadth-first walk of the hierarchy under a space or directory. Folders are listed concurrently and entries are
+    yielded as soon as their folder listing arrives. A folder is always yielded before its children.
+    :param manager: DYS manager used for listing
+    :param root_cid: Space or directory Cid to walk. The root itself is not yielded.
+    :param cont_group: Container type of the root. Sub folders are listed as DIRECTORY.
+    :param max_workers: Number of folders listed in parallel
+    :param page_size: Page size of the folder listings
+    :param folder_check: Callable deciding whether an entry is a folder, defaults to is_folder
+    :return: Generator of :class:`TreeEntry`
+    """
+    def list_folder(cid, group):
+        return list(manager.iter_dir_structure(cid, cont_group=group, page_size=page_size, prefetch=False))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(list_folder, root_cid, cont_group): (root_cid, "")}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parent, parent_path = pending.pop(future)
+                    for item in future.result():
+                        path = parent_path + "/" + item.get("name", item["cid"]) if parent_path \
+                            else item.get("name", item["cid"])
+                        if folder_check(item):
+                            yield TreeEntry(item["cid"], parent, path, Container.DIRECTORY)
+                            pending[executor.submit(list_folder, item["cid"], Container.DIRECTORY)] = \
+                                (item["cid"], path)
+                        else:
+                            yield TreeEntry(item["cid"], parent, path, Container.DOCUMENT)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class TreeIndex:
+    """
+    A local SQLite snapshot of a DYS folder hierarchy that can be queried by cid or path without calling DYS.
+
+        with TreeIndex("space.db") as index:
+            index.build(manager, space_cid, cont_group=Container.SPACE)
+            entry = index.get_by_path("reports/2023/q1.html")
+
+    Attributes
+    ----------
+    db_path : str
+        SQLite database file, ":memory:" keeps the index in memory
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._connection:
+            self._create_table("entries")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def build(self, manager: DYSManager, root_cid: str, cont_group: Container = Container.DIRECTORY,
+              max_workers: int = DEFAULT_MAX_WORKERS, batch_size: int = 1000, **walk_kwargs) -> int:
+        """
+        Replace the index content with a fresh walk of the hierarchy under root_cid. The walk is written to a
+        staging table that replaces the entries only once it completed, so a failed build keeps the previous index.
+        :param manager: DYS manager used for listing
+        :param root_cid: Space or directory Cid to walk
+        :param cont_group: Container type of the root
+        :param max_workers: Number of folders listed in parallel
+        :param batch_size: Number of entries written per transaction
+        :param walk_kwargs: Other walk_tree parameters
+        :return: Number of indexed entries
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DROP TABLE IF EXISTS entries_build")
+            self._create_table("entries_build")
+        try:
+            count = 0
+            batch = []
+            for entry in walk_tree(manager, root_cid, cont_group=cont_group, max_workers=max_workers,
+                                   **walk_kwargs):
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    count += self._write("entries_build", batch)
+                    batch = []
+            count += self._write("entries_build", batch)
+        except BaseException:
+            with self._lock, self._connection:
+                self._connection.execute("DROP TABLE IF EXISTS entries_build")
+            raise
+        with self._lock, self._connection:
+            # sqlite3 does not open a transaction for DDL by itself, without one a failure after the DROP
+            # would leave no entries table at all
+            self._connection.execute("BEGIN")
+            self._connection.execute("DROP TABLE entries")
+            self._connection.execute("ALTER TABLE entries_build RENAME TO entries")
+            self._create_indexes("entries")
+        return count
+
+    def add(self, entries) -> int:
+        """
+        Insert or replace entries.
+        :param entries: Iterable of :class:`TreeEntry`
+        :return: Number of written entries
+        """
+        return self._write("entries", entries)
+
+    def _write(self, table: str, entries) -> int:
+        rows = [(entry.cid, entry.parent, entry.path, entry.type.value) for entry in entries]
+        with self._lock, self._connection:
+            self._connection.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def _create_table(self, table: str):
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                                 "(cid TEXT PRIMARY KEY, parent TEXT, path TEXT NOT NULL, type TEXT NOT NULL)")
+        if table == "entries":
+            self._create_indexes(table)
+
+    def _create_indexes(self, table: str):
+        # Indexes are added after a build, writing the staging table without them is faster
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_path ON {table} (path)")
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_parent ON {table} (parent)")
+
+    def get_by_cid(self, cid: str):
+        """
+        :param cid: Dys Cid
+        :return: :class:`TreeEntry` or None
+        """
+        return self._fetch_one("SELECT cid, parent, path, type FROM entries WHERE cid = ?", (cid,))
+
+    def get_by_path(self, path: str):
+        """
+        :param path: Slash separated path relative to the indexed root
+        :return: :class:`TreeEntry` or None
+        """
+        return self._fetch_one("SELECT cid, parent, path, type FROM entries WHERE path = ?", (path.strip("/"),))
+
+    def children(self, cid: str) -> list:
+        """
+        :param cid: Folder Cid
+        :return: List of :class:`TreeEntry` directly under the folder
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT cid, parent, path, type FROM entries WHERE parent = ? ORDER BY path", (cid,)).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __iter__(self):
+        with self._lock:
+            rows = self._connection.execute("SELECT cid, parent, path, type FROM entries ORDER BY path").fetchall()
+        return (self._to_entry(row) for row in rows)
+
+    def _fetch_one(self, query: str, params: tuple):
+        with self._lock:
+            row = self._connection.execute(query, params).fetchone()
+        return self._to_entry(row) if row else None
+
+    @staticmethod
+    def _to_entry(row) -> TreeEntry:
+        return TreeEntry(row[0], row[1], row[2], Container(row[3]))
+
+
+class CopyJournal:
+    """
+    SQLite record of the entries copied by copy_tree, mapping source cids to the cids of their copies, or of the
+    documents saved by download_tree, mapping cids to local paths.
+    Passing the same journal to a repeated call resumes it: recorded entries are not copied again.
+    Use one journal per copied hierarchy.
+
+    Attributes
+    ----------
+    db_path : str
+        SQLite database file, ":memory:" keeps the journal in memory
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS copies (source_cid TEXT PRIMARY KEY, target_cid TEXT NOT NULL)")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, source_cid: str):
+        """
+        :param source_cid: Cid of a source entry
+        :return: Cid of its copy or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT target_cid FROM copies WHERE source_cid = ?", (source_cid,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, source_cid: str, target_cid: str):
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO copies VALUES (?, ?)", (source_cid, target_cid))
+
+    def mapping(self) -> dict:
+        with self._lock:
+            return dict(self._connection.execute("SELECT source_cid, target_cid FROM copies").fetchall())
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM copies").fetchone()[0]
+
+
+def copy_tree(manager: DYSManager, source_cid: str, target_parent_cid: str, journal: CopyJournal = None,
+              x_lang: str = None, add_copy_of_prefix: bool = False, root_name: str = None,
+              cont_group: Container = Container.DIRECTORY, max_workers: int = DEFAULT_MAX_WORKERS,
+              page_size: int = DEFAULT_PAGE_SIZE, folder_check: Callable[[dict], bool] = is_folder) -> CopyTreeReport:
+    """
+    Copy a folder and everything under it into another folder. Folders are recreated with post_folder and
+    documents are copied with copy_document, both concurrently while the source hierarchy is still being walked.
+    Every finished entry is recorded in journal, so calling copy_tree again with the same journal after a partial
+    failure copies only what is missing.
+    :param manager: DYS manager
+    :param source_cid: Cid of the folder to copy
+    :param target_parent_cid: Cid of the folder that receives the copy
+    :param journal: (Optional) CopyJournal of this copy. Pass a file backed journal to be able to resume.
+    :param x_lang: (Optional) Passed to every copy_document call. Ex: tr_TR or en_US
+    :param add_copy_of_prefix: Passed to every copy_document call. Recreated folders keep their names.
+    :param root_name: (Optional) Name of the new root folder, defaults to the name of the source folder
+    :param cont_group: Container type of the source folder
+    :param max_workers: Number of folders and documents copied in parallel
+    :param page_size: Page size of the folder listings
+    :param folder_check: Callable deciding whether an entry is a folder, defaults to is_folder
+    :return: :class:`CopyTreeReport`. Entries under a folder that could not be created fail with its exception.
+    """
+    journal = journal if journal is not None else CopyJournal()
+    report = CopyTreeReport(source_cid)
+    try:
+        root = journal.get(source_cid)
+        if root is None:
+            name = root_name or manager.get_document_without_content(source_cid)["name"]
+            root = manager.post_folder(target_parent_cid, name)
+            journal.put(source_cid, root)
+    except Exception as e:
+        report.failed[source_cid] = e
+        return report
+    report.target_cid = root
+    # Cids of the copies of folders, completed by the task creating the copy
+    targets = {source_cid: Future()}
+    targets[source_cid].set_result(root)
+
+    def entries():
+        for entry in walk_tree(manager, source_cid, cont_group=cont_group, max_workers=max_workers,
+                               page_size=page_size, folder_check=folder_check):
+            if entry.type is Container.DIRECTORY:
+                targets[entry.cid] = Future()
+            yield entry
+
+    def copy(entry):
+        # Entries are submitted in walk order, so the task of a parent folder always starts before its children
+        target = journal.get(entry.cid)
+        if entry.type is Container.DIRECTORY:
+            future = targets[entry.cid]
+            try:
+                if target is None:
+                    target = manager.post_folder(targets[entry.parent].result(), entry.path.rsplit("/", 1)[-1])
+                    journal.put(entry.cid, target)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            future.set_result(target)
+            return target
+        if target is None:
+            response = manager.copy_document(entry.cid, targets[entry.parent].result(), x_lang=x_lang,
+                                             add_copy_of_prefix=add_copy_of_prefix)
+            target = manager.json_loads(response.content)["cid"]
+            journal.put(entry.cid, target)
+        return target
+
+    try:
+        for res in bounded_map(copy, entries(), max_workers=max_workers):
+            if res.error is not None:
+                report.failed[res.item.cid] = res.error
+    except Exception as e:
+        # Listing failed, entries that were not walked are copied by the next run
+        report.failed.setdefault(source_cid, e)
+    report.mapping = journal.mapping()
+    return report
+
+
+def move_tree(manager: DYSManager, source_cid: str, target_parent_cid: str, journal: CopyJournal = None,
+              permanently: bool = False, **copy_kwargs) -> CopyTreeReport:
+    """
+    Move a folder hierarchy by copying it with copy_tree and deleting the source once every entry was copied.
+    A partially failed move leaves the source in place and can be resumed with the same journal.
+    :param manager: DYS manager
+    :param source_cid: Cid of the folder to move
+    :param target_parent_cid: Cid of the folder that receives the folder
+    :param journal: (Optional) CopyJournal of this move
+    :param permanently: Delete the source permanently instead of sending it to recycle
+    :param copy_kwargs: Other copy_tree parameters
+    :return: :class:`CopyTreeReport`
+    """
+    report = copy_tree(manager, source_cid, target_parent_cid, journal=journal, **copy_kwargs)
+    if report.ok:
+        try:
+            if permanently:
+                manager.delete_permanently(source_cid)
+            else:
+                manager.delete(source_cid)
+        except Exception as e:
+            report.failed[source_cid] = e
+    return report
+
+
+def _safe_name(name: str, cid: str) -> str:
+    """
+    :return: name usable as a single local path segment
+    """
+    for character in ("/", "\\", "\0"):
+        name = name.replace(character, "_")
+    return "_" + cid if name in ("", ".", "..") else name
+
+
+def _unique_name(name: str, cid: str, taken: set) -> str:
+    if name.casefold() not in taken:
+        return name
+    stem, extension = os.path.splitext(name)
+    return _safe_name(f"{stem} ({cid}){extension}", cid)
+
+
+def download_tree(manager: DYSManager, folder_cid: str, local_dir: str, journal: CopyJournal = None,
+                  cont_group: Container = Container.DIRECTORY, max_workers: int = DEFAULT_MAX_WORKERS,
+                  page_size: int = DEFAULT_PAGE_SIZE, folder_check: Callable[[dict], bool] = is_folder,
+                  progress: Callable[[str, str, int], None] = None) -> CopyTreeReport:
+    """
+    Download every document under a folder into a local directory tree, concurrently and with constant memory.
+    Finished documents are recorded in journal and skipped by later runs with the same journal; a document that
+    was interrupted continues from the size of its partial file.
+    Separators in names are replaced and the names "", "." and ".." are escaped, so nothing is written outside of
+    local_dir. A name already taken by a sibling gets the cid of its entry appended, e.g. "dup (cid).html".
+    :param manager: DYS manager
+    :param folder_cid: Cid of the folder to download
+    :param local_dir: Local directory receiving the folder content
+    :param journal: (Optional) CopyJournal of this download. Pass a file backed journal to be able to resume.
+    :param cont_group: Container type of the folder
+    :param max_workers: Number of documents downloaded in parallel
+    :param page_size: Page size of the folder listings
+    :param folder_check: Callable deciding whether an entry is a folder, defaults to is_folder
+    :param progress: (Optional) Callable(kind, path, size) called in the calling thread for every finished
+    document. kind is "download" or "unchanged", size is the number of downloaded bytes.
+    :return: :class:`CopyTreeReport` whose mapping holds document cids mapped to paths relative to local_dir
+    """
+    journal = journal if journal is not None else CopyJournal()
+    progress = progress or (lambda kind, path, size: None)
+    report = CopyTreeReport(folder_cid)
+    os.makedirs(local_dir, exist_ok=True)
+    root = os.path.realpath(local_dir)
+    # Walked path and local relative path of every folder, names are taken from the walked paths
+    folders = {folder_cid: ("", "")}
+    siblings = {"parent": None, "names": set()}
+
+    def local_path(entry):
+        parent_path, parent_local = folders[entry.parent]
+        name = entry.path[len(parent_path) + 1:] if parent_path else entry.path
+        if siblings["parent"] != entry.parent:
+            # walk_tree yields the children of a folder together, so only one folder's names are kept
+            siblings.update(parent=entry.parent, names=set())
+        recorded = journal.get(entry.cid) if entry.type is Container.DOCUMENT else None
+        if recorded is not None and os.path.dirname(recorded) == parent_local and \
+                os.path.basename(recorded).casefold() not in siblings["names"]:
+            # Keep the name given by an earlier run, duplicates may have been listed in another order
+            name = os.path.basename(recorded)
+        else:
+            name = _unique_name(_safe_name(name, entry.cid), entry.cid, siblings["names"])
+        siblings["names"].add(name.casefold())
+        path = parent_local + "/" + name if parent_local else name
+        if not os.path.realpath(os.path.join(root, *path.split("/"))).startswith(root + os.sep):
+            raise ValueError(f"{entry.path} resolves outside of {local_dir}")
+        return path
+
+    def documents():
+        for entry in walk_tree(manager, folder_cid, cont_group=cont_group, max_workers=max_workers,
+                               page_size=page_size, folder_check=folder_check):
+            if entry.parent not in folders:
+                # Below a folder that failed
+                continue
+            try:
+                path = local_path(entry)
+            except ValueError as e:
+                report.failed[entry.cid] = e
+                continue
+            if entry.type is Container.DIRECTORY:
+                folders[entry.cid] = (entry.path, path)
+                os.makedirs(os.path.join(local_dir, *path.split("/")), exist_ok=True)
+            else:
+                yield entry._replace(path=path)
+
+    def download(entry):
+        path = os.path.join(local_dir, *entry.path.split("/"))
+        if journal.get(entry.cid) == entry.path and os.path.exists(path):
+            return None
+        size = manager.download_document(entry.cid, path)
+        journal.put(entry.cid, entry.path)
+        return size
+
+    try:
+        for res in bounded_map(download, documents(), max_workers=max_workers):
+            if res.error is not None:
+                report.failed[res.item.cid] = res.error
+            elif res.result is None:
+                progress("unchanged", res.item.path, 0)
+            else:
+                progress("download", res.item.path, res.result)
+    except Exception as e:
+        report.failed.setdefault(folder_cid, e)
+    report.mapping = journal.mapping()
+    return report
@@ -19,6 +19,13 @@ setup(
     long_description_content_type="text/markdown",
     setup_requires=['wheel'],
     install_requires=['requests'],
+    extras_require={
+        'async': ['httpx'],
+        'fast': ['orjson'],
+    },
+    entry_points={
+        'console_scripts': ['dys-transfer=dys_connector.cli:main'],
+    },
     url='https://github.com/logo-group/dys-connector',
     author='Mustafa Talha Arslan, Furkan Arif Bozdag, Hilal Ozkan',
     author_email='mustafa.arslan@logo.com.tr, arif.bozdag@logo.com.tr, hilal.ozkan@logo.com.tr'
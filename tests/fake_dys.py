@@ -0,0 +1,330 @@
+"""
+A local stand-in for the DYS HTTP API, used by tests and benchmarks.
+
+It implements every route of ENDPOINTS on an in-memory store and can add latency, inject errors and seed a folder
+with generated documents:
+
+    with FakeDYSServer(latency=0.005, error_rate=0.01, seed_documents=1000, payload_size=64 * 1024) as server:
+        manager = DYSManager(server.base_url, "token")
+        manager.get_dir_structure(SEED_FOLDER_CID)
+
+Run ``python -m tests.fake_dys --port 8080`` to serve it standalone.
+"""
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import itertools
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dys_connector.dys_api_manager import ENDPOINTS
+
+ROOT_CID = "root"
+SEED_FOLDER_CID = "seed-folder"
+FOLDER = "FOLDER"
+DOCUMENT = "DOCUMENT"
+
+_ROUTES = [(task, re.compile("^" + path.replace("{cid}", "(?P<cid>[^/?]+)") + "$")) for task, path in
+           ENDPOINTS.items()]
+
+
+class FakeDYSStore:
+    """
+    Thread-safe in-memory documents and folders.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {ROOT_CID: {"cid": ROOT_CID, "name": "root", "type": FOLDER, "parent": None}}
+        self.children = {ROOT_CID: []}
+        self.shares = {}
+        self._ids = itertools.count(1)
+
+    def new_cid(self) -> str:
+        return f"cid-{next(self._ids)}"
+
+    def add(self, parent: str, name: str, item_type: str, content: bytes = b"", var_values: dict = None,
+            tag_ids: list = None, cid: str = None) -> dict:
+        with self.lock:
+            if parent not in self.children:
+                raise KeyError(parent)
+            cid = cid or self.new_cid()
+            item = {"cid": cid, "name": name, "type": item_type, "parent": parent, "version": 1}
+            if item_type == FOLDER:
+                self.children[cid] = []
+            else:
+                item.update({"content": content, "varValues": var_values or {}, "tagIds": tag_ids or []})
+            self.items[cid] = item
+            self.children[parent].append(cid)
+            return item
+
+    def remove(self, cid: str):
+        with self.lock:
+            item = self.items.pop(cid)
+            self.children[item["parent"]].remove(cid)
+            stack = self.children.pop(cid, [])
+            while stack:
+                child = stack.pop()
+                self.items.pop(child, None)
+                stack.extend(self.children.pop(child, []))
+
+    def seed(self, count: int, payload_size: int, folder_cid: str = SEED_FOLDER_CID):
+        if folder_cid not in self.items:
+            self.add(ROOT_CID, folder_cid, FOLDER, cid=folder_cid)
+        payload = (b"<html><body>" + b"x" * payload_size)[:payload_size]
+        for i in range(count):
+            self.add(folder_cid, f"doc-{i}.html", DOCUMENT, content=payload, var_values={"index": str(i)},
+                     cid=f"{folder_cid}-doc-{i}")
+
+
+class FakeDYSServer:
+    """
+    Threaded HTTP server answering DYS routes from a FakeDYSStore.
+
+    Attributes
+    ----------
+    latency : float
+        Seconds added to every response
+    error_rate: float
+        Probability of answering a request with error_status instead of handling it
+    error_status: int
+        Status code of injected errors
+    token: str
+        If set, requests without "Authorization: Bearer <token>" get 401
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, token: str = None, seed_documents: int = 0, payload_size: int = 1024):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token = token
+        self.store = FakeDYSStore()
+        self.requests = []
+        if seed_documents:
+            self.store.seed(seed_documents, payload_size)
+        self.httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _handler_for(server: FakeDYSServer):
+    store = server.store
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PUT(self):
+            self._dispatch("PUT")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        def _dispatch(self, method: str):
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            server.requests.append((method, url.path))
+            if server.latency:
+                time.sleep(server.latency)
+            if server.token and self.headers.get("Authorization") != "Bearer " + server.token:
+                return self._send(401, b"")
+            if server.error_rate and random.random() < server.error_rate:
+                return self._send(server.error_status, b"")
+            for task, pattern in _ROUTES:
+                match = pattern.match(url.path)
+                if match:
+                    handler = getattr(self, f"_{task.lower()}_{method.lower()}", None)
+                    if handler is None:
+                        return self._send(405, b"")
+                    try:
+                        return handler(match.groupdict().get("cid"), query, body)
+                    except KeyError:
+                        return self._send(404, b"")
+            self._send(404, b"")
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, value, status: int = 200):
+            self._send(status, json.dumps(value).encode("utf-8"))
+
+        def _state_get(self, cid, query, body):
+            self._json({"state": "FINE"})
+
+        def _upload_folder_post(self, cid, query, body):
+            item = store.add(query["parentFolderCid"], query["folderName"], FOLDER)
+            self._json({"cid": item["cid"]})
+
+        def _upload_document_post(self, cid, query, body):
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body)
+            dto, content = {}, b""
+            for part in message.iter_parts():
+                if part.get_param("name", header="content-disposition") == "uploadDocumentDTO":
+                    dto = json.loads(part.get_content())
+                else:
+                    content = part.get_payload(decode=True)
+            item = store.add(query["parentFolderCid"], dto.get("name", "document"), DOCUMENT, content=content,
+                             var_values=dto.get("varValues"), tag_ids=dto.get("tagIds"))
+            self._json({"cid": item["cid"], "name": item["name"]})
+
+        def _dir_structure_get(self, cid, query, body):
+            _from, size = int(query.get("from", 0)), int(query.get("size", 10000))
+            with store.lock:
+                cids = store.children[query["folderCid"]][_from:_from + size]
+                entries = [{key: store.items[child][key] for key in ("cid", "name", "type")} for child in cids]
+            self._json(entries)
+
+        def _get_doc_meta_get(self, cid, query, body):
+            item = store.items[cid]
+            self._json({"cid": cid, "varValues": item.get("varValues", {}), "tagIds": item.get("tagIds", [])})
+
+        def _update_doc_meta_put(self, cid, query, body):
+            payload = json.loads(body)
+            item = store.items[cid]
+            with store.lock:
+                item["varValues"] = payload.get("varValues", {})
+                item["tagIds"] = payload.get("tagIds", [])
+                item["version"] += 1
+            self._json({"cid": cid})
+
+        def _get_doc_info_get(self, cid, query, body):
+            item = store.items[cid]
+            info = {key: value for key, value in item.items() if key != "content"}
+            info["size"] = len(item.get("content", b""))
+            self._json(info)
+
+        def _external_share_get(self, cid, query, body):
+            store.items[cid]
+            self._json([{"shareLink": link} for link in store.shares.get(cid, [])])
+
+        def _external_share_post(self, cid, query, body):
+            self._create_share(cid)
+
+        def _link_external_share_post(self, cid, query, body):
+            self._create_share(cid)
+
+        def _create_share(self, cid):
+            store.items[cid]
+            with store.lock:
+                links = store.shares.setdefault(cid, [])
+                link = f"{server.base_url}/share?cid={cid}&id={len(links)}"
+                links.append(link)
+            self._json({"externalShareMailLinkMap": {"link": link}})
+
+        def _doc_content_get(self, cid, query, body):
+            content = store.items[cid]["content"]
+            etag = '"%s"' % hashlib.sha1(content).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", headers={"ETag": etag})
+            match = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+            if_range = self.headers.get("If-Range")
+            if not match or (if_range is not None and if_range != etag):
+                return self._send(200, content, "text/html", headers={"ETag": etag})
+            start = int(match.group(1))
+            if start >= len(content):
+                return self._send(416, b"", headers={"Content-Range": f"bytes */{len(content)}"})
+            self._send(206, content[start:], "text/html",
+                       headers={"Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}", "ETag": etag})
+
+        def _copy_post(self, cid, query, body):
+            source = store.items[cid]
+            name = source["name"]
+            if query.get("addCopyOfPrefix") == "True":
+                name = f"{name} - Kopya" if self.headers.get("X-Lang") == "tr_TR" else f"Copy of {name}"
+            item = store.add(query.get("targetFolderCid", ROOT_CID), name, source["type"],
+                             content=source.get("content", b""), var_values=dict(source.get("varValues", {})),
+                             tag_ids=list(source.get("tagIds", [])))
+            self._json({"cid": item["cid"], "name": item["name"]})
+
+        def _rename_post(self, cid, query, body):
+            store.items[cid]["name"] = query["fileName"]
+            self._json({"cid": cid})
+
+        def _delete_delete(self, cid, query, body):
+            store.remove(cid)
+            self._json({})
+
+        def _delete_perma_delete(self, cid, query, body):
+            store.remove(cid)
+            self._json({})
+
+    return Handler
+
+
+def _serve(queue, kwargs):
+    server = FakeDYSServer(**kwargs)
+    queue.put(server.base_url)
+    server.httpd.serve_forever()
+
+
+def start_in_process(**kwargs):
+    """
+    Run a FakeDYSServer in a child process, so its allocations do not count towards measurements of the caller.
+    :param kwargs: FakeDYSServer parameters
+    :return: (process, base_url). Terminate the process to stop the server.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(queue, kwargs), daemon=True)
+    process.start()
+    return process, queue.get(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake DYS API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed-documents", type=int, default=0)
+    parser.add_argument("--payload-size", type=int, default=1024)
+    args = parser.parse_args()
+    fake = FakeDYSServer(args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+                         seed_documents=args.seed_documents, payload_size=args.payload_size)
+    print(f"Fake DYS listening on {fake.base_url}")
+    fake.httpd.serve_forever()
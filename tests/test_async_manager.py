@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from dys_connector.async_dys_api_manager import AsyncDYSManager  # noqa: E402
+from dys_connector.exceptions import DysBadGatewayError  # noqa: E402
+
+
+def run_with_transport(handler, coroutine_factory, **manager_kwargs):
+    async def run():
+        async with AsyncDYSManager("https://dys-endpoint/", "token", corid="corid", **manager_kwargs) as manager:
+            manager.client._transport = httpx.MockTransport(handler)
+            return await coroutine_factory(manager)
+
+    return asyncio.run(run())
+
+
+def test_get_doc_metadata():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, text=json.dumps({"varValues": {"meta1": "value1"}}))
+
+    metadata = run_with_transport(handler, lambda manager: manager.get_doc_metadata("cid"))
+    assert metadata == {"meta1": "value1"}
+    assert seen[0].url.path == "/api/v2.0/document/viewDocumentMetadata/cid"
+    assert seen[0].headers["Authorization"] == "Bearer token"
+    assert seen[0].headers["corid"] == "corid"
+
+
+def test_copy_document_keeps_prefix_semantics():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, text=json.dumps({"cid": "new"}))
+
+    run_with_transport(handler, lambda manager: manager.copy_document("cid", "parent", "en_US", True))
+    assert seen[0].url.params["addCopyOfPrefix"] == "True"
+    assert seen[0].url.params["targetFolderCid"] == "parent"
+    assert seen[0].headers["X-Lang"] == "en_US"
+
+
+def test_error_mapping_and_concurrency_limit():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if request.url.path.endswith("/bad"):
+            return httpx.Response(502)
+        return httpx.Response(200)
+
+    async def many(manager):
+        await asyncio.gather(*(manager.delete(str(i)) for i in range(20)))
+        with pytest.raises(DysBadGatewayError):
+            await manager.delete("bad")
+
+    run_with_transport(handler, many, max_concurrency=3)
+    assert peak <= 3
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from dys_connector.auth import RefreshingTokenProvider
+from dys_connector.concurrency import bounded_map
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.exceptions import DysUnauthorizedError
+from tests.fake_dys import SEED_FOLDER_CID, FakeDYSServer
+
+
+class TokenSource:
+    def __init__(self, expires_in=3600):
+        self.calls = 0
+        self.expires_in = expires_in
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            return f"token-{self.calls}", self.expires_in
+
+
+def test_tokens_are_refreshed_ahead_of_expiry():
+    now = [0.0]
+    source = TokenSource(expires_in=100)
+    provider = RefreshingTokenProvider(source, refresh_margin=10, timer=lambda: now[0])
+
+    assert provider.get_token() == "token-1"
+    now[0] = 89
+    assert provider.get_token() == "token-1"
+    now[0] = 90
+    assert provider.get_token() == "token-2"
+
+
+def test_invalidate_refreshes_once_per_rejected_token():
+    source = TokenSource()
+    provider = RefreshingTokenProvider(source)
+    provider.get_token()
+
+    threads = [threading.Thread(target=provider.invalidate, args=("token-1",)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert source.calls == 2
+    assert provider.get_token() == "token-2"
+
+
+def test_manager_replays_requests_after_a_coalesced_refresh():
+    source = TokenSource()
+    provider = RefreshingTokenProvider(source)
+    with FakeDYSServer(seed_documents=20, token="token-1") as server:
+        manager = DYSManager(server.base_url, provider, pool_maxsize=8)
+        assert manager.get_doc_metadata(f"{SEED_FOLDER_CID}-doc-0") == {"index": "0"}
+
+        server.token = "token-2"
+        cids = [f"{SEED_FOLDER_CID}-doc-{i}" for i in range(20)]
+        results = list(bounded_map(manager.get_doc_metadata, cids, max_workers=8))
+
+        assert all(res.error is None for res in results)
+        assert source.calls == 2
+
+
+def test_static_token_is_not_replayed():
+    with FakeDYSServer(token="valid") as server:
+        manager = DYSManager(server.base_url, "expired")
+        with pytest.raises(DysUnauthorizedError):
+            manager.check_state()
+        assert len(server.requests) == 1
@@ -0,0 +1,41 @@
+import os
+
+from dys_connector.cli import main
+from tests.fake_dys import ROOT_CID, FakeDYSServer
+
+
+def test_upload_and_download_resume_from_journal(tmp_path, capsys):
+    source, target = tmp_path / "source", tmp_path / "target"
+    os.makedirs(str(source / "sub"))
+    (source / "a.txt").write_bytes(b"a" * 100)
+    (source / "sub" / "b.html").write_bytes(b"<html>b</html>")
+
+    with FakeDYSServer() as server:
+        common = ["--url", server.base_url, "--token", "token", "--workers", "2"]
+        upload = common + ["upload", str(source), ROOT_CID, "--journal", str(tmp_path / "up.db")]
+        assert main(upload) == 0
+        assert "2 transferred, 0 skipped" in capsys.readouterr().err
+        assert main(upload) == 0
+        assert "0 transferred, 2 skipped" in capsys.readouterr().err
+
+        download = common + ["download", ROOT_CID, str(target), "--journal", str(tmp_path / "down.db")]
+        assert main(download) == 0
+        assert (target / "a.txt").read_bytes() == b"a" * 100
+        assert (target / "sub" / "b.html").read_bytes() == b"<html>b</html>"
+        requests_before = len(server.requests)
+        assert main(download) == 0
+        assert "0 transferred, 2 skipped" in capsys.readouterr().err
+        assert not any("content" in path for _, path in server.requests[requests_before:])
+
+
+def test_upload_from_source_directory_skips_default_journal(tmp_path, monkeypatch, capsys):
+    (tmp_path / "a.html").write_bytes(b"<html>a</html>")
+    monkeypatch.chdir(tmp_path)
+
+    with FakeDYSServer() as server:
+        upload = ["--url", server.base_url, "--token", "token", "upload", ".", ROOT_CID]
+        assert main(upload) == 0
+        assert main(upload) == 0
+        assert "0 transferred, 1 skipped" in capsys.readouterr().err.splitlines()[-1]
+        assert (tmp_path / "dys-upload.db").exists()
+        assert sorted(server.store.items[cid]["name"] for cid in server.store.children[ROOT_CID]) == ["a.html"]
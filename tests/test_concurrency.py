@@ -0,0 +1,37 @@
+import itertools
+import threading
+
+from dys_connector.concurrency import bounded_map
+
+
+def test_bounded_map_limits_items_taken_from_input():
+    taken = itertools.count()
+    release = threading.Event()
+
+    def items():
+        for i in range(1000):
+            next(taken)
+            yield i
+
+    def work(item):
+        release.wait(1)
+        return item * 2
+
+    results = bounded_map(work, items(), max_workers=2)
+    release.set()
+    first = next(results)
+    assert first.error is None and first.result == first.item * 2
+    assert next(taken) <= 6
+    assert sorted(res.result for res in itertools.chain([first], results)) == [i * 2 for i in range(1000)]
+
+
+def test_bounded_map_captures_errors():
+    def work(item):
+        if item == 2:
+            raise ValueError(item)
+        return item
+
+    results = list(bounded_map(work, range(5), max_workers=3))
+    errors = [res for res in results if res.error is not None]
+    assert len(results) == 5
+    assert len(errors) == 1 and errors[0].item == 2 and isinstance(errors[0].error, ValueError)
@@ -0,0 +1,72 @@
+import multiprocessing
+
+from dys_connector.content_cache import ContentCache
+from dys_connector.dto import DocumentInfo
+from dys_connector.dys_api_manager import DYSManager
+from tests.fake_dys import ROOT_CID, DOCUMENT, FakeDYSServer
+
+
+def content_requests(server):
+    return sum("/document/content/" in path for _, path in server.requests)
+
+
+def test_cached_content_is_validated_by_version(tmp_path):
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager, \
+            ContentCache(str(tmp_path)) as cache:
+        cid = server.store.add(ROOT_CID, "a.html", DOCUMENT, content=b"version 1")["cid"]
+
+        assert cache.read(manager, cid) == b"version 1"
+        assert cache.read(manager, cid) == b"version 1"
+        assert content_requests(server) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+        server.store.items[cid]["content"] = b"version 2"
+        manager.update_metadata(cid, {}, "doc_type")
+        assert cache.read(manager, cid) == b"version 2"
+        assert content_requests(server) == 2 and len(cache) == 1 and cache.size() == 9
+
+
+def test_content_without_version_is_revalidated_with_etag(tmp_path, mocker):
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager, \
+            ContentCache(str(tmp_path)) as cache:
+        cid = server.store.add(ROOT_CID, "a.html", DOCUMENT, content=b"content")["cid"]
+        mocker.patch.object(manager, "get_document_without_content", return_value=DocumentInfo(cid))
+
+        assert cache.read(manager, cid) == b"content"
+        assert cache.read(manager, cid) == b"content"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        server.store.items[cid]["content"] = b"changed"
+        assert cache.read(manager, cid) == b"changed"
+
+
+def test_least_recently_used_documents_are_evicted(tmp_path):
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager, \
+            ContentCache(str(tmp_path), max_size=25) as cache:
+        cids = [server.store.add(ROOT_CID, f"{i}.html", DOCUMENT, content=b"x" * 10)["cid"] for i in range(3)]
+        cache.read(manager, cids[0])
+        cache.read(manager, cids[1])
+        cache.read(manager, cids[0])
+        cache.read(manager, cids[2])
+
+        assert len(cache) == 2 and cache.size() == 20
+        cache.read(manager, cids[0])
+        assert cache.misses == 3
+        assert len([name for name in tmp_path.iterdir() if not name.name.startswith("index.db")]) == 2
+
+
+def _read_in_process(base_url, directory, cid, queue):
+    with DYSManager(base_url, "token") as manager, ContentCache(directory) as cache:
+        queue.put((cache.read(manager, cid), cache.hits))
+
+
+def test_cache_is_shared_between_processes(tmp_path):
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager, \
+            ContentCache(str(tmp_path)) as cache:
+        cid = server.store.add(ROOT_CID, "a.html", DOCUMENT, content=b"shared")["cid"]
+        cache.read(manager, cid)
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_read_in_process, args=(server.base_url, str(tmp_path), cid, queue))
+        process.start()
+        assert queue.get(timeout=30) == (b"shared", 1)
+        process.join()
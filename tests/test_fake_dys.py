@@ -0,0 +1,106 @@
+import hashlib
+
+import pytest
+
+from dys_connector.dto import UploadDocumentDTO
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.exceptions import DysServiceTemporarilyUnavailable
+from dys_connector.retry import NO_RETRY
+from tests.fake_dys import ROOT_CID, SEED_FOLDER_CID, FakeDYSServer
+
+
+@pytest.fixture
+def server():
+    with FakeDYSServer(seed_documents=25, payload_size=5000) as fake:
+        yield fake
+
+
+@pytest.fixture
+def manager(server):
+    with DYSManager(server.base_url, "token") as dys:
+        yield dys
+
+
+def test_end_to_end_document_lifecycle(manager, tmp_path):
+    assert manager.check_state() == "FINE"
+    folder_cid = manager.post_folder(ROOT_CID, "folder")
+    source = tmp_path / "doc.html"
+    source.write_bytes(b"<html>" + b"a" * 100000)
+
+    cid = manager.upload_document(folder_cid, UploadDocumentDTO("doc.html"), str(source))
+    assert [entry["cid"] for entry in manager.get_dir_structure(folder_cid)] == [cid]
+
+    meta = manager.get_doc_metadata(cid)
+    meta["dys_cid"] = cid
+    manager.update_metadata(cid, meta, "doc_type")
+    assert manager.get_doc_metadata(cid) == {"dys_cid": cid}
+
+    target = tmp_path / "download.html"
+    target.write_bytes(source.read_bytes()[:1234])
+    assert manager.download_document(cid, target) == source.stat().st_size
+    assert target.read_bytes() == source.read_bytes()
+
+    copy_cid = manager.copy_document(cid, folder_cid, "en_US", True).json()["cid"]
+    assert manager.get_document_without_content(copy_cid)["name"] == "Copy of doc.html"
+
+    manager.clear_directory(folder_cid)
+    assert manager.get_dir_structure(folder_cid) == []
+
+
+def test_paginated_listing_of_seeded_folder(manager):
+    entries = list(manager.iter_dir_structure(SEED_FOLDER_CID, page_size=10))
+    assert [entry["cid"] for entry in entries] == [f"{SEED_FOLDER_CID}-doc-{i}" for i in range(25)]
+
+
+def test_error_injection(server):
+    server.error_rate = 1.0
+    with DYSManager(server.base_url, "token", retry_policy=NO_RETRY) as dys:
+        with pytest.raises(DysServiceTemporarilyUnavailable):
+            dys.get_doc_metadata(f"{SEED_FOLDER_CID}-doc-0")
+
+
+def test_resolve_external_share_reuses_links(server, manager):
+    cids = [f"{SEED_FOLDER_CID}-doc-{i}" for i in range(5)]
+    existing = manager.generate_external_share(cids[0], hide_name=False)
+    server.requests.clear()
+
+    links = {res.item: res.result for res in manager.resolve_external_shares(cids + cids[:2], max_workers=4)}
+
+    assert links[cids[0]] == existing.replace("hideName=False", "hideName=True")
+    assert sum(1 for method, _ in server.requests if method == "POST") == 4
+    assert all(len(server.store.shares[cid]) == 1 for cid in cids)
+
+    server.requests.clear()
+    assert manager.resolve_external_share(cids[1]) == links[cids[1]]
+    assert server.requests == []
+
+    manager.delete(cids[1])
+    assert manager.share_cache.get(cids[1]) is None
+
+
+
+def etag_of(server, cid):
+    return '"%s"' % hashlib.sha1(server.store.items[cid]["content"]).hexdigest()
+
+
+def test_download_resume_restarts_when_document_changed(server, manager, tmp_path, caplog):
+    cid = server.store.add(ROOT_CID, "doc.html", "DOCUMENT", content=b"A" * 10)["cid"]
+    target, part = tmp_path / "doc.html", tmp_path / "doc.html.part"
+    validator = tmp_path / "doc.html.part.validator"
+    assert manager.download_document(cid, target) == 10
+
+    server.store.items[cid]["content"] = b"B" * 20
+    assert manager.download_document(cid, target) == 20
+    assert target.read_bytes() == b"B" * 20
+
+    for partial in (b"B" * 7, b"B" * 20):
+        part.write_bytes(partial)
+        validator.write_text(etag_of(server, cid))
+        assert manager.download_document(cid, target) == 20
+        assert target.read_bytes() == b"B" * 20 and not part.exists() and not validator.exists()
+
+    part.write_bytes(b"B" * 20)
+    validator.write_text(etag_of(server, cid))
+    server.store.items[cid]["content"] = b"C" * 5
+    assert manager.download_document(cid, target) == 5 and target.read_bytes() == b"C" * 5
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]
@@ -0,0 +1,24 @@
+import pytest
+
+from dys_connector import json_decoder
+from dys_connector.dys_api_manager import DYSManager
+
+BODY = '[{"cid": "1", "name": "İçerik.html"}]'.encode("utf-8")
+
+
+def test_decoders_parse_bytes():
+    assert json_decoder.std_loads(BODY) == [{"cid": "1", "name": "İçerik.html"}]
+    if json_decoder.orjson is not None:
+        assert json_decoder.orjson_loads(BODY) == json_decoder.std_loads(BODY)
+        assert json_decoder.loads is json_decoder.orjson_loads
+
+
+def test_orjson_loads_requires_orjson(monkeypatch):
+    monkeypatch.setattr(json_decoder, "orjson", None)
+    with pytest.raises(ImportError):
+        json_decoder.orjson_loads(BODY)
+
+
+def test_manager_uses_pluggable_decoder():
+    assert DYSManager("dys-endpoint", "token").json_loads is json_decoder.loads
+    assert DYSManager("dys-endpoint", "token", json_loads=json_decoder.std_loads).json_loads is json_decoder.std_loads
@@ -1,8 +1,30 @@
-from dys_connector.dys_api_manager import DYSManager
+import io
+import json
+import threading
+
+import pytest
+import requests
+
+from dys_connector.cache import TTLCache
+from dys_connector.dto import DirectoryEntry, UploadDocumentDTO
+from dys_connector.dys_api_manager import Container, DYSManager
+from dys_connector.exceptions import (DysBadGatewayError, DysBadRequestError, DysClearDirectoryItemDeleteException,
+                                      DysInternalServerError)
 
 manager = DYSManager("dys-endpoint", "token")
 
 
+def test_typed_results(mocker):
+    entries = [{"cid": "1", "name": "a.html", "type": "DOCUMENT", "size": 10, "extra": "dropped"}]
+    mocker.patch.object(manager.session, "request", side_effect=[
+        json_response(entries), json_response({"cid": "1", "name": "a.html", "version": 3, "tagIds": ["t"]})])
+
+    assert manager.get_dir_structure("folder", typed=True) == [DirectoryEntry("1", "a.html", "DOCUMENT", size=10)]
+    info = manager.get_document_without_content("1", typed=True)
+    assert (info.cid, info.version, info.tag_ids) == ("1", 3, ["t"])
+    assert not hasattr(info, "__dict__")
+
+
 def test_copy_document(mocker):
 
     def mock_copy_document(self, doc_cid: str, parent_folder_cid: str = None, x_lang: str = None,
@@ -31,3 +53,256 @@ def test_copy_document(mocker):
     res = manager.copy_document("cid", "parent")
     assert res["status_code"] == 200
     assert res["text"] == "document.html"
+
+
+def test_requests_share_pooled_session(mocker):
+    with DYSManager("dys-endpoint", "token", pool_maxsize=4, connect_timeout=1, read_timeout=2) as pooled:
+        response = json_response({"varValues": {"meta1": "value1"}})
+        request = mocker.patch.object(pooled.session, "request", return_value=response)
+
+        assert pooled.get_doc_metadata("cid") == {"meta1": "value1"}
+        pooled.delete("cid")
+
+        assert request.call_count == 2
+        for call in request.call_args_list:
+            assert call.kwargs["timeout"] == (1, 2)
+        assert pooled.session.get_adapter("https://dys-endpoint")._pool_maxsize == 4
+        close = mocker.patch.object(pooled.session, "close")
+    close.assert_called_once()
+
+
+def test_post_contents_reports_each_item(mocker, tmp_path):
+    path = tmp_path / "doc1.html"
+    path.write_text("<html></html>")
+
+    def mock_request(method, url, headers=None, data=None, params=None, endpoint=None):
+        body = data.read()
+        name = "broken.html" if b'filename="broken.html"' in body else body.split(b'filename="')[1].split(b'"')[0]
+        assert headers["Content-Type"] == data.content_type
+        assert b"<html></html>" in body or name == "broken.html"
+        if name == "broken.html":
+            raise DysBadRequestError()
+        return json_response({"cid": params["parentFolderCid"] + "/" + name.decode()})
+
+    mocker.patch.object(manager, "make_dys_request", side_effect=mock_request)
+    items = [
+        ("parent", UploadDocumentDTO("doc1.html"), str(path)),
+        ("parent", UploadDocumentDTO("doc2.html"), b"<html></html>"),
+        ("parent", UploadDocumentDTO("broken.html"), b""),
+    ]
+
+    results = {res.item[1].name: res for res in manager.post_contents(iter(items), max_workers=2)}
+
+    assert results["doc1.html"].result == "parent/doc1.html"
+    assert results["doc2.html"].result == "parent/doc2.html"
+    assert results["broken.html"].result is None
+    assert isinstance(results["broken.html"].error, DysBadRequestError)
+
+
+def test_upload_document_sends_mime_type(mocker):
+    request = mocker.patch.object(manager, "make_dys_request", return_value=json_response({"cid": "new"}))
+
+    assert manager.upload_document("parent", UploadDocumentDTO("a.txt"), b"text", mime_type="text/plain") == "new"
+    assert request.call_args.kwargs["params"] == {"parentFolderCid": "parent", "mimeType": "text/plain"}
+    assert b"Content-Type: text/plain" in request.call_args.kwargs["data"].read()
+
+
+def json_response(value, status_code=200):
+    return make_response(status_code, json.dumps(value).encode())
+
+
+def make_response(status_code, body: bytes):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def test_iter_document_content_streams_chunks(mocker):
+    request = mocker.patch.object(manager.session, "request", return_value=make_response(200, b"0123456789"))
+
+    assert list(manager.iter_document_content("cid", chunk_size=4)) == [b"0123", b"4567", b"89"]
+    assert request.call_args.kwargs["stream"] is True
+    assert "Range" not in request.call_args.kwargs["headers"]
+
+
+def test_iter_document_content_skips_offset_when_range_is_ignored(mocker):
+    request = mocker.patch.object(manager.session, "request", return_value=make_response(200, b"0123456789"))
+
+    assert b"".join(manager.iter_document_content("cid", chunk_size=4, offset=6)) == b"6789"
+    assert request.call_args.kwargs["headers"]["Range"] == "bytes=6-"
+
+
+def test_download_document_resumes_part_with_if_range(mocker, tmp_path):
+    path = tmp_path / "doc.html"
+    path.write_bytes(b"old content")
+    (tmp_path / "doc.html.part").write_bytes(b"01234")
+    (tmp_path / "doc.html.part.validator").write_text('"v1"')
+    response = make_response(206, b"456789")
+    response.headers["Content-Range"] = "bytes 4-9/10"
+    request = mocker.patch.object(manager.session, "request", return_value=response)
+
+    assert manager.download_document("cid", path, chunk_size=2) == 10
+    assert path.read_bytes() == b"0123456789"
+    assert request.call_args.kwargs["headers"]["Range"] == "bytes=4-"
+    assert request.call_args.kwargs["headers"]["If-Range"] == '"v1"'
+    assert sorted(child.name for child in tmp_path.iterdir()) == ["doc.html"]
+
+
+def test_download_document_does_not_resume_unknown_files(mocker, tmp_path):
+    path = tmp_path / "doc.html"
+    path.write_bytes(b"01234")
+    (tmp_path / "doc.html.part").write_bytes(b"xyz")
+    request = mocker.patch.object(manager.session, "request", return_value=make_response(200, b"abc"))
+
+    assert manager.download_document("cid", path) == 3
+    assert path.read_bytes() == b"abc"
+    assert "Range" not in request.call_args.kwargs["headers"]
+
+
+def test_download_document_to_file_object(mocker):
+    mocker.patch.object(manager.session, "request", return_value=make_response(200, b"content"))
+    buffer = io.BytesIO()
+
+    assert manager.download_document("cid", buffer) == 7
+    assert buffer.getvalue() == b"content"
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_dir_structure_pages_through_folder(mocker, prefetch):
+    entries = [{"cid": str(i)} for i in range(25)]
+
+    def mock_get_dir_structure(folder_cid, cont_group=Container.DIRECTORY, _from=0, _to=10000, typed=False):
+        return entries[_from:_from + _to]
+
+    get_dir_structure = mocker.patch.object(manager, "get_dir_structure", side_effect=mock_get_dir_structure)
+
+    assert list(manager.iter_dir_structure("folder", page_size=10, prefetch=prefetch)) == entries
+    assert [call.kwargs["_from"] for call in get_dir_structure.call_args_list] == [0, 10, 20]
+
+
+def test_iter_dir_structure_rejects_oversized_pages():
+    with pytest.raises(ValueError):
+        next(manager.iter_dir_structure("folder", page_size=20000))
+
+
+def test_cache_serves_repeated_reads_until_a_write(mocker):
+    cached = DYSManager("dys-endpoint", "token", cache=TTLCache(maxsize=10, ttl=60))
+    request = mocker.patch.object(cached.session, "request",
+                                  return_value=json_response({"varValues": {"meta1": "value1"}}))
+
+    meta = cached.get_doc_metadata("cid")
+    meta["doc_url"] = "changed by caller"
+    assert cached.get_doc_metadata("cid") == {"meta1": "value1"}
+    assert request.call_count == 1
+    assert cached.cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    cached.update_metadata("cid", meta, "doc_type")
+    cached.get_doc_metadata("cid")
+    assert request.call_count == 3
+
+    cached.get_document_without_content("cid")
+    cached.rename_document("cid", "new_name")
+    cached.get_document_without_content("cid")
+    assert request.call_count == 6
+
+
+def test_read_overlapping_a_write_is_not_cached(mocker):
+    cached = DYSManager("dys-endpoint", "token", cache=TTLCache(maxsize=10, ttl=60))
+    read_started, write_done = threading.Event(), threading.Event()
+
+    def slow_old_read():
+        read_started.set()
+        write_done.wait(5)
+        return {"v": "old"}
+
+    mocker.patch.object(cached, "_get_doc_metadata", side_effect=lambda cid: slow_old_read())
+    mocker.patch.object(cached.session, "request", return_value=json_response({}))
+    reader = threading.Thread(target=cached.get_doc_metadata, args=("cid",))
+    reader.start()
+    read_started.wait(5)
+    cached.update_metadata("cid", {"v": "new"}, "doc_type")
+    write_done.set()
+    reader.join()
+
+    assert cached.cache.get(("GET_DOC_META", "cid")) is None and cached._generations == {}
+
+
+def test_cache_invalidates_on_failed_delete(mocker):
+    cached = DYSManager("dys-endpoint", "token", cache=TTLCache())
+    cached.cache.set(("GET_DOC_INFO", "cid"), {"cid": "cid"})
+    mocker.patch.object(cached.session, "request", return_value=make_response(500, b""))
+
+    with pytest.raises(DysInternalServerError):
+        cached.delete_permanently("cid")
+    assert len(cached.cache) == 0
+
+
+def test_clear_directory_reports_failures_without_stopping(mocker):
+    entries = [{"cid": str(i)} for i in range(30)]
+    mocker.patch.object(manager, "iter_dir_structure", return_value=iter(entries))
+
+    def mock_delete(cid):
+        if cid in ("3", "17"):
+            raise DysInternalServerError()
+
+    delete = mocker.patch.object(manager, "delete_permanently", side_effect=mock_delete)
+
+    report = manager.clear_directory_report("folder", permanently=True, max_workers=4)
+
+    assert delete.call_count == 30
+    assert sorted(report.failed) == ["17", "3"]
+    assert sorted(report.deleted, key=int) == [str(i) for i in range(30) if i not in (3, 17)]
+    assert not report.ok
+
+
+def test_clear_directory_raises_with_report(mocker):
+    mocker.patch.object(manager, "iter_dir_structure", return_value=iter([{"cid": "1"}, {"cid": "2"}]))
+    mocker.patch.object(manager, "delete", side_effect=[None, DysBadGatewayError()])
+
+    with pytest.raises(DysClearDirectoryItemDeleteException) as exc_info:
+        manager.clear_directory("folder", max_workers=1)
+    assert exc_info.value.report.deleted == ["1"]
+    assert isinstance(exc_info.value.__cause__, DysBadGatewayError)
+
+    mocker.patch.object(manager, "iter_dir_structure", return_value=iter([{"cid": "1"}]))
+    mocker.patch.object(manager, "delete", return_value=None)
+    assert manager.clear_directory("folder") == "folder"
+
+
+def test_update_metadata_bulk_skips_unchanged(mocker):
+    metadata = {"1": {"doc_url": "old"}, "2": {"doc_url": "https://share/2"}, "3": {}}
+    mocker.patch.object(manager, "_get_doc_metadata", side_effect=lambda cid: dict(metadata[cid]))
+
+    def mock_update_metadata(cid, meta, type_id):
+        if cid == "3":
+            raise DysBadRequestError()
+
+    update = mocker.patch.object(manager, "update_metadata", side_effect=mock_update_metadata)
+
+    def transform(cid, meta):
+        meta["doc_url"] = f"https://share/{cid}"
+        return meta
+
+    results = {res.item: res for res in manager.update_metadata_bulk(iter(["1", "2", "3"]), transform,
+                                                                     lambda cid: "type-" + cid, max_workers=2)}
+
+    assert results["1"].result is True
+    assert results["2"].result is False and results["2"].error is None
+    assert isinstance(results["3"].error, DysBadRequestError)
+    update.assert_any_call("1", {"doc_url": "https://share/1"}, "type-1")
+    assert update.call_count == 2
+
+
+def test_update_metadata_bulk_reads_past_the_cache(mocker):
+    cached = DYSManager("dys-endpoint", "token", cache=TTLCache(maxsize=10, ttl=60))
+    cached.cache.set(("GET_DOC_META", "cid"), {"title": "stale"})
+    mocker.patch.object(cached.session, "request", return_value=json_response({"varValues": {"title": "current"}}))
+    update = mocker.patch.object(cached, "update_metadata")
+
+    def transform(cid, meta):
+        meta["dys_cid"] = cid
+        return meta
+
+    assert [res.result for res in cached.update_metadata_bulk(["cid"], transform, "doc_type")] == [True]
+    update.assert_called_once_with("cid", {"title": "current", "dys_cid": "cid"}, "doc_type")
@@ -0,0 +1,69 @@
+import io
+import json
+import logging
+
+import requests
+
+from dys_connector.dys_api_manager import MAX_LOG_BODY_SIZE, DYSManager
+from dys_connector.metrics import InMemoryMetrics
+
+
+def response(status_code, body: bytes, request_body: bytes = b""):
+    res = requests.Response()
+    res.status_code = status_code
+    res._content = body
+    res.request = requests.Request("POST", "https://dys-endpoint", data=request_body).prepare()
+    return res
+
+
+def test_histogram_snapshot():
+    metrics = InMemoryMetrics(buckets=(0.1, 1))
+    for latency in (0.05, 0.05, 0.5, 3):
+        metrics.record("GET_DOC_META", "GET", 200, latency, 0, 10)
+    metrics.record("GET_DOC_META", "GET", None, 0.01, 0, 0)
+
+    stats = metrics.snapshot()["GET_DOC_META"]
+    assert stats["count"] == 5 and stats["errors"] == 1
+    assert stats["status_codes"] == {200: 4, 0: 1}
+    assert stats["bytes_in"] == 40
+    assert stats["latency"]["histogram"] == {"0.1": 3, "1": 1, "+Inf": 1}
+    assert stats["latency"]["p50"] == 0.1
+    assert stats["latency"]["p99"] == 3
+
+    out = io.StringIO()
+    metrics.export_json(out)
+    assert json.loads(out.getvalue())["endpoints"]["GET_DOC_META"]["count"] == 5
+
+
+def test_manager_records_per_endpoint(mocker):
+    metrics = InMemoryMetrics()
+    manager = DYSManager("dys-endpoint", "token", metrics=metrics)
+    mocker.patch.object(manager.session, "request", side_effect=[
+        response(200, b'{"cid": "new"}', b"x" * 10), response(404, b"")])
+
+    manager.post_folder("parent", "folder")
+    try:
+        manager.delete("cid")
+    except Exception:
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot["UPLOAD_FOLDER"]["bytes_out"] == 10
+    assert snapshot["UPLOAD_FOLDER"]["bytes_in"] == len(b'{"cid": "new"}')
+    assert snapshot["DELETE"]["status_codes"] == {404: 1}
+
+
+def test_logs_exclude_payloads_and_truncate_bodies(mocker, caplog):
+    manager = DYSManager("dys-endpoint", "token")
+    mocker.patch.object(manager.session, "request", return_value=response(400, b"e" * (MAX_LOG_BODY_SIZE * 5)))
+
+    with caplog.at_level(logging.INFO):
+        try:
+            manager.post_content("parent", {"uploadDocumentDTO": "{}"}, [("file", ("a.html", b"SECRET", "text/html"))])
+        except Exception:
+            pass
+
+    assert "SECRET" not in caplog.text
+    assert "UPLOAD_DOCUMENT" in caplog.text
+    assert "e" * MAX_LOG_BODY_SIZE + "..." in caplog.text
+    assert "e" * (MAX_LOG_BODY_SIZE + 1) not in caplog.text
@@ -0,0 +1,48 @@
+import io
+import mmap
+
+from urllib3.filepost import encode_multipart_formdata
+
+from dys_connector.dto import UploadDocumentDTO
+from dys_connector.multipart import MultipartStream
+
+CONTENT = "<html>İçerik</html>".encode("utf-8") * 1000
+
+
+def expected_body(dto):
+    body, _ = encode_multipart_formdata(
+        [("uploadDocumentDTO", dto.get_as_json()), ("file", (dto.name, CONTENT, "text/html"))], boundary="b0undary")
+    return body
+
+
+def read_all(stream, block_size=1000):
+    return b"".join(bytes(block) for block in iter(lambda: stream.read(block_size), b""))
+
+
+def test_body_matches_requests_encoding_for_every_source(tmp_path):
+    dto = UploadDocumentDTO("belge.html")
+    path = tmp_path / "belge.html"
+    path.write_bytes(CONTENT)
+
+    with open(path, "rb") as file, open(path, "r+b") as mapped_file:
+        mapped = mmap.mmap(mapped_file.fileno(), 0)
+        for source in (str(path), path, file, CONTENT, mapped, io.BytesIO(CONTENT)):
+            with MultipartStream([("uploadDocumentDTO", dto.get_as_json())],
+                                 [("file", dto.name, source, "text/html")], boundary="b0undary") as stream:
+                body = read_all(stream)
+                assert body == expected_body(dto)
+                assert len(stream) == len(body)
+        mapped.close()
+
+
+def test_seek_replays_body():
+    dto = UploadDocumentDTO("belge.html")
+    stream = MultipartStream([("uploadDocumentDTO", dto.get_as_json())], [("file", dto.name, CONTENT, "text/html")])
+    first = read_all(stream, 333)
+    assert stream.tell() == len(stream)
+
+    stream.seek(0)
+    assert read_all(stream, 4096) == first
+
+    stream.seek(len(first) - 10)
+    assert read_all(stream) == first[-10:]
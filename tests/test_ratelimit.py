@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+import requests
+
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.exceptions import DysServiceTemporarilyUnavailable
+from dys_connector.ratelimit import AdaptiveConcurrency, RateLimiter, TokenBucket
+from dys_connector.retry import NO_RETRY
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, timer=clock.time, sleep=clock.sleep)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    assert clock.sleeps == pytest.approx([0.1, 0.1])
+
+
+def test_adaptive_concurrency_shrinks_on_errors_and_grows_back():
+    concurrency = AdaptiveConcurrency(initial=10, min_limit=2, max_limit=12, latency_threshold=1)
+
+    for _ in range(3):
+        concurrency.acquire()
+        concurrency.release(latency=0.1, error=True)
+    assert concurrency.limit == pytest.approx(10 * 0.7 ** 3)
+
+    concurrency.acquire()
+    concurrency.release(latency=5, error=False)
+    assert concurrency.limit == pytest.approx(10 * 0.7 ** 4)
+
+    for _ in range(200):
+        concurrency.acquire()
+        concurrency.release(latency=0.1, error=False)
+    assert concurrency.limit == 12
+
+
+def test_adaptive_concurrency_blocks_above_limit():
+    concurrency = AdaptiveConcurrency(initial=2)
+    concurrency.acquire()
+    concurrency.acquire()
+    acquired = threading.Event()
+
+    def acquire():
+        concurrency.acquire()
+        acquired.set()
+
+    threading.Thread(target=acquire, daemon=True).start()
+    assert not acquired.wait(0.05)
+    concurrency.release(latency=0, error=False)
+    assert acquired.wait(1)
+
+
+def test_shared_limiter_records_server_errors(mocker):
+    limiter = RateLimiter(rate=1000, endpoint_rates={"DELETE": (1000, 5)}, adaptive=True)
+    managers = [DYSManager("dys-endpoint", "token", rate_limiter=limiter, retry_policy=NO_RETRY) for _ in range(2)]
+    for manager in managers:
+        response = requests.Response()
+        response.status_code = 503
+        response._content = b""
+        mocker.patch.object(manager.session, "request", return_value=response)
+    initial = limiter.concurrency.limit
+
+    for manager in managers:
+        with pytest.raises(DysServiceTemporarilyUnavailable):
+            manager.delete("cid")
+
+    assert limiter.concurrency.limit < initial
+    assert limiter.concurrency.in_flight == 0
+    assert set(limiter.endpoint_buckets) == {"DELETE"}
@@ -0,0 +1,102 @@
+import io
+
+import pytest
+import requests
+
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.exceptions import DysBadGatewayError, DysCircuitOpenError, DysServiceTemporarilyUnavailable
+from dys_connector.retry import ALL_METHODS, NO_RETRY, CircuitBreaker, RetryPolicy, get_retry_after
+
+
+def response(status_code, text="", headers=None):
+    res = requests.Response()
+    res.status_code = status_code
+    res._content = text.encode()
+    res.headers.update(headers or {})
+    return res
+
+
+@pytest.fixture
+def sleep(mocker):
+    return mocker.patch("dys_connector.dys_api_manager.time.sleep")
+
+
+def test_idempotent_requests_are_retried(mocker, sleep):
+    manager = DYSManager("dys-endpoint", "token", retry_policy=RetryPolicy(total=3, jitter=False))
+    request = mocker.patch.object(manager.session, "request", side_effect=[
+        response(502), requests.exceptions.ConnectionError(), response(200, '{"varValues": {}}')])
+
+    assert manager.get_doc_metadata("cid") == {}
+    assert request.call_count == 3
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+
+def test_retries_are_bounded_and_honor_retry_after(mocker, sleep):
+    manager = DYSManager("dys-endpoint", "token", retry_policy=RetryPolicy(total=2))
+    mocker.patch.object(manager.session, "request", return_value=response(503, headers={"Retry-After": "7"}))
+
+    with pytest.raises(DysServiceTemporarilyUnavailable) as exc_info:
+        manager.delete("cid")
+    assert sleep.call_count == 2
+    assert all(call.args[0] == 7 for call in sleep.call_args_list)
+    assert get_retry_after(exc_info.value) == 7
+
+
+def test_uploads_are_retried_only_on_opt_in(mocker, sleep):
+    manager = DYSManager("dys-endpoint", "token")
+    request = mocker.patch.object(manager.session, "request", return_value=response(502))
+    with pytest.raises(DysBadGatewayError):
+        manager.post_folder("parent", "folder")
+    assert request.call_count == 1
+
+    manager = DYSManager("dys-endpoint", "token", retry_policies={
+        "UPLOAD_FOLDER": RetryPolicy(total=1, methods=ALL_METHODS)})
+    request = mocker.patch.object(manager.session, "request",
+                                  side_effect=[response(502), response(200, '{"cid": "new"}')])
+    assert manager.post_folder("parent", "folder") == "new"
+    assert request.call_count == 2
+
+
+def test_upload_retry_rewinds_files_given_as_dict(mocker, sleep):
+    manager = DYSManager("dys-endpoint", "token", retry_policies={
+        "UPLOAD_DOCUMENT": RetryPolicy(total=1, methods=ALL_METHODS)})
+    file = io.BytesIO(b"<html></html>")
+    sent = []
+
+    def request(method, url, **kwargs):
+        sent.append(kwargs["files"]["file"][1].read())
+        return response(502) if len(sent) == 1 else response(200, '{"cid": "new"}')
+
+    mocker.patch.object(manager.session, "request", side_effect=request)
+    assert manager.post_content("parent", {}, {"file": ("a.html", file, "text/html")}).status_code == 200
+    assert sent == [b"<html></html>", b"<html></html>"]
+
+    request = mocker.patch.object(manager.session, "request", return_value=response(502))
+    with pytest.raises(DysBadGatewayError):
+        manager.post_content("parent", {}, {"file": ("a.html", file, "text/html")})
+    assert request.call_count == 2
+
+
+def test_circuit_breaker_fails_fast_and_recovers_with_check_state(mocker, sleep):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, timer=lambda: now[0])
+    manager = DYSManager("dys-endpoint", "token", retry_policy=NO_RETRY, circuit_breaker=breaker)
+    request = mocker.patch.object(manager.session, "request", return_value=response(502))
+
+    for _ in range(2):
+        with pytest.raises(DysBadGatewayError):
+            manager.delete("cid")
+    with pytest.raises(DysCircuitOpenError):
+        manager.delete("cid")
+    assert request.call_count == 2
+
+    now[0] = 11
+    request.return_value = response(200, '{"state": "WARNING"}')
+    with pytest.raises(DysCircuitOpenError):
+        manager.delete("cid")
+    assert request.call_args.args[1].endswith("/api/diagnose")
+
+    now[0] = 22
+    request.return_value = response(200, '{"state": "FINE"}')
+    manager.delete("cid")
+    assert breaker.state == CircuitBreaker.CLOSED
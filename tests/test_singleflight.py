@@ -0,0 +1,146 @@
+import json
+import threading
+
+import pytest
+import requests
+
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.singleflight import SingleFlight
+from tests.fake_dys import SEED_FOLDER_CID, FakeDYSServer
+
+
+def run_concurrently(fn, count):
+    results, barrier = [None] * count, threading.Barrier(count)
+
+    def target(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_call_and_its_error():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        raise ValueError("boom")
+
+    leader = threading.Thread(target=lambda: pytest.raises(ValueError, flight.do, "key", slow))
+    leader.start()
+    while not calls:
+        pass
+    follower_errors = []
+
+    def follower():
+        try:
+            flight.do("key", slow)
+        except ValueError as e:
+            follower_errors.append(e)
+
+    followers = [threading.Thread(target=follower) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flight._calls["key"].waiters < 3:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(calls) == 1 and len(follower_errors) == 3 and len(flight) == 0
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_forget_starts_a_new_call():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        return len(calls)
+
+    leader = threading.Thread(target=flight.do, args=("key", slow))
+    leader.start()
+    while not calls:
+        pass
+    flight.forget("key")
+    release.set()
+    assert flight.do("key", slow) == (2, False)
+    leader.join()
+
+
+def test_forget_if_forgets_matching_calls():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        release.wait()
+
+    leaders = [threading.Thread(target=flight.do, args=(key, slow)) for key in (("list", "a"), ("list", "b"))]
+    for thread in leaders:
+        thread.start()
+    while len(calls) < 2:
+        pass
+    flight.forget_if(lambda key: key[1] == "a")
+    assert list(flight._calls) == [("list", "b")]
+    release.set()
+    for thread in leaders:
+        thread.join()
+
+
+@pytest.mark.parametrize("write", [lambda manager: manager.post_folder("folder", "sub"),
+                                   lambda manager: manager.delete("sub")])
+def test_listing_after_a_write_does_not_join_an_older_listing(mocker, write):
+    manager = DYSManager("dys-endpoint", "token", coalesce=True)
+    children, listings, release = [], [], threading.Event()
+
+    def request(method, url, **kwargs):
+        res = requests.Response()
+        res.status_code = 200
+        if "directoryStructure" in url:
+            snapshot = list(children)
+            listings.append(url)
+            if len(listings) == 1:
+                release.wait(timeout=5)
+            res._content = json.dumps(snapshot).encode()
+        else:
+            children.append({"cid": "sub", "name": "sub"})
+            res._content = b'{"cid": "sub"}'
+        return res
+
+    mocker.patch.object(manager.session, "request", side_effect=request)
+    stale = threading.Thread(target=manager.get_dir_structure, args=("folder",))
+    stale.start()
+    while not listings:
+        pass
+    write(manager)
+    assert manager.get_dir_structure("folder") == [{"cid": "sub", "name": "sub"}]
+    assert len(listings) == 2
+    release.set()
+    stale.join()
+
+
+def test_manager_coalesces_identical_reads():
+    with FakeDYSServer(latency=0.05, seed_documents=2) as server, \
+            DYSManager(server.base_url, "token", coalesce=True) as manager:
+        cid = f"{SEED_FOLDER_CID}-doc-0"
+        results = run_concurrently(lambda: manager.get_doc_metadata(cid), 8)
+
+        assert results == [{"index": "0"}] * 8
+        assert len({id(result) for result in results}) == 8
+        assert server.requests.count(("GET", f"/api/v2.0/document/viewDocumentMetadata/{cid}")) == 1
+
+        run_concurrently(lambda: manager.get_dir_structure(SEED_FOLDER_CID), 8)
+        assert sum(path.endswith("directoryStructure") for _, path in server.requests) == 1
+
+        manager.get_doc_metadata(cid)
+        assert server.requests.count(("GET", f"/api/v2.0/document/viewDocumentMetadata/{cid}")) == 2
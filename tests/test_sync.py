@@ -0,0 +1,73 @@
+import os
+
+from dys_connector.dys_api_manager import DYSManager
+from dys_connector.sync import SyncIndex, sync_directory
+from tests.fake_dys import ROOT_CID, FakeDYSServer
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def test_sync_directory_uploads_only_changes(tmp_path):
+    source = tmp_path / "source"
+    write(str(source / "a.html"), "<html>a</html>")
+    write(str(source / "sub" / "b.html"), "<html>b</html>")
+    write(str(source / "notes.txt"), "ignored")
+    metadata = {"a.html": {"title": "A"}, "sub/b.html": {"title": "B"}}
+
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager, \
+            SyncIndex(str(tmp_path / "sync.db")) as index:
+        def sync(**kwargs):
+            return sync_directory(manager, str(source), ROOT_CID, index, metadata=lambda path: metadata[path],
+                                  max_workers=2, **kwargs)
+
+        report = sync()
+        assert sorted(report.uploaded) == ["a.html", "sub/b.html"] and report.ok
+        documents = index.documents()
+        b_item = server.store.items[documents["sub/b.html"].cid]
+        assert server.store.items[b_item["parent"]]["name"] == "sub"
+        assert b_item["content"] == b"<html>b</html>" and b_item["varValues"] == {"title": "B"}
+
+        assert sorted(sync().unchanged) == ["a.html", "sub/b.html"]
+
+        metadata["a.html"] = {"title": "A2"}
+        write(str(source / "sub" / "b.html"), "<html>b changed</html>")
+        report = sync()
+        assert report.metadata_updated == ["a.html"] and report.uploaded == ["sub/b.html"]
+        assert server.store.items[documents["a.html"].cid]["varValues"] == {"title": "A2"}
+        assert documents["sub/b.html"].cid not in server.store.items
+        assert server.store.items[index.documents()["sub/b.html"].cid]["content"] == b"<html>b changed</html>"
+
+        os.remove(str(source / "a.html"))
+        assert sync().deleted == []
+        report = sync(delete_removed=True)
+        assert report.deleted == ["a.html"] and "a.html" not in index.documents()
+        assert documents["a.html"].cid not in server.store.items
+
+
+def test_sync_directory_indexes_each_file_and_resumes_after_failure(tmp_path):
+    source = tmp_path / "source"
+    for name in ("a", "b", "c"):
+        write(str(source / f"{name}.html"), f"<html>{name}</html>")
+
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager, \
+            SyncIndex(str(tmp_path / "sync.db")) as index:
+        upload_document = manager.upload_document
+
+        def failing_upload(folder_cid, dto, path, **kwargs):
+            if path.endswith("b.html"):
+                raise ConnectionError("interrupted")
+            return upload_document(folder_cid, dto, path, **kwargs)
+
+        manager.upload_document = failing_upload
+        report = sync_directory(manager, str(source), ROOT_CID, index, max_workers=2, keep_paths=False)
+        assert list(report.failed) == ["b.html"] and report.counts["upload"] == 2 and report.uploaded == []
+        assert sorted(index.documents()) == ["a.html", "c.html"]
+
+        manager.upload_document = upload_document
+        report = sync_directory(manager, str(source), ROOT_CID, index, max_workers=2)
+        assert report.uploaded == ["b.html"] and sorted(report.unchanged) == ["a.html", "c.html"] and report.ok
+        assert len([item for item in server.store.items.values() if item.get("content")]) == 3
@@ -0,0 +1,161 @@
+import sqlite3
+
+import pytest
+
+from dys_connector.dys_api_manager import Container, DYSManager
+from dys_connector.exceptions import DysInternalServerError
+from dys_connector.tree import CopyJournal, TreeIndex, copy_tree, download_tree, is_folder, move_tree, walk_tree
+from tests.fake_dys import DOCUMENT, FOLDER, ROOT_CID, FakeDYSServer
+
+TREE = {
+    "root": [{"cid": "a", "name": "a", "type": "FOLDER"}, {"cid": "d1", "name": "d1.html", "type": "DOCUMENT"}],
+    "a": [{"cid": "b", "name": "b", "type": "FOLDER"}, {"cid": "d2", "name": "d2.html", "type": "DOCUMENT"}],
+    "b": [{"cid": "d3", "name": "d3.html", "type": "DOCUMENT"}],
+}
+
+
+def make_manager(mocker):
+    manager = DYSManager("dys-endpoint", "token")
+
+    def mock_iter_dir_structure(folder_cid, cont_group=Container.DIRECTORY, page_size=1000, prefetch=True):
+        return iter(TREE[folder_cid])
+
+    mocker.patch.object(manager, "iter_dir_structure", side_effect=mock_iter_dir_structure)
+    return manager
+
+
+def test_is_folder():
+    assert is_folder({"type": "folder"})
+    assert is_folder({"isFolder": True})
+    assert not is_folder({"type": "DOCUMENT"})
+
+
+def test_walk_tree_yields_paths_breadth_first(mocker):
+    entries = list(walk_tree(make_manager(mocker), "root", max_workers=2))
+
+    assert sorted((entry.cid, entry.parent, entry.path, entry.type) for entry in entries) == [
+        ("a", "root", "a", Container.DIRECTORY),
+        ("b", "a", "a/b", Container.DIRECTORY),
+        ("d1", "root", "d1.html", Container.DOCUMENT),
+        ("d2", "a", "a/d2.html", Container.DOCUMENT),
+        ("d3", "b", "a/b/d3.html", Container.DOCUMENT),
+    ]
+    order = [entry.cid for entry in entries]
+    assert order.index("a") < order.index("d2") and order.index("b") < order.index("d3")
+
+
+def test_tree_index_lookup(mocker, tmp_path):
+    db_path = str(tmp_path / "tree.db")
+    with TreeIndex(db_path) as index:
+        assert index.build(make_manager(mocker), "root", batch_size=2) == 5
+
+    with TreeIndex(db_path) as index:
+        assert len(index) == 5
+        assert index.get_by_path("/a/b/d3.html").cid == "d3"
+        assert index.get_by_cid("b").path == "a/b"
+        assert [entry.cid for entry in index.children("a")] == ["b", "d2"]
+        assert index.get_by_path("missing") is None
+
+
+def seed_tree(store):
+    source = store.add(ROOT_CID, "source", FOLDER)["cid"]
+    sub = store.add(source, "sub", FOLDER)["cid"]
+    store.add(source, "a.html", DOCUMENT, content=b"a")
+    store.add(sub, "b.html", DOCUMENT, content=b"b")
+    store.add(sub, "c.html", DOCUMENT, content=b"c")
+    return source, store.add(ROOT_CID, "target", FOLDER)["cid"]
+
+
+def names_under(store, cid, prefix=""):
+    names = []
+    for child in store.children.get(cid, []):
+        path = prefix + store.items[child]["name"]
+        names.append(path)
+        names.extend(names_under(store, child, path + "/"))
+    return sorted(names)
+
+
+def test_copy_tree_resumes_with_journal(mocker, tmp_path):
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager:
+        source, target = seed_tree(server.store)
+        copy_document = manager.copy_document
+        failing = next(cid for cid, item in server.store.items.items() if item["name"] == "c.html")
+
+        def flaky_copy(doc_cid, *args, **kwargs):
+            if doc_cid == failing:
+                raise DysInternalServerError()
+            return copy_document(doc_cid, *args, **kwargs)
+
+        mocker.patch.object(manager, "copy_document", side_effect=flaky_copy)
+        with CopyJournal(str(tmp_path / "copy.db")) as journal:
+            report = copy_tree(manager, source, target, journal=journal, x_lang="tr_TR", add_copy_of_prefix=True,
+                               max_workers=2)
+            assert list(report.failed) == [failing] and len(report.mapping) == 4
+
+        mocker.patch.object(manager, "copy_document", side_effect=copy_document)
+        with CopyJournal(str(tmp_path / "copy.db")) as journal:
+            report = copy_tree(manager, source, target, journal=journal, x_lang="tr_TR", add_copy_of_prefix=True)
+            assert report.ok and len(report.mapping) == 5
+
+        assert manager.copy_document.call_count == 1
+        assert names_under(server.store, target) == ["source", "source/a.html - Kopya", "source/sub",
+                                                     "source/sub/b.html - Kopya", "source/sub/c.html - Kopya"]
+        copied = server.store.items[report.mapping[failing]]
+        assert copied["content"] == b"c" and copied["parent"] == report.mapping[server.store.items[failing]["parent"]]
+
+
+def test_move_tree_deletes_source_after_copy():
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager:
+        source, target = seed_tree(server.store)
+        report = move_tree(manager, source, target, root_name="moved")
+
+        assert report.ok and source not in server.store.items
+        assert names_under(server.store, target) == ["moved", "moved/a.html", "moved/sub", "moved/sub/b.html",
+                                                     "moved/sub/c.html"]
+
+
+def test_failed_build_keeps_previous_index(mocker):
+    with TreeIndex() as index:
+        manager = make_manager(mocker)
+        index.build(manager, "root")
+        manager.iter_dir_structure.side_effect = DysInternalServerError()
+
+        with pytest.raises(DysInternalServerError):
+            index.build(manager, "root")
+        assert len(index) == 5 and index.get_by_path("a/b/d3.html").cid == "d3"
+
+
+def test_download_tree_keeps_unsafe_and_duplicate_names_inside_local_dir(tmp_path):
+    local_dir = tmp_path / "local"
+    with FakeDYSServer() as server, DYSManager(server.base_url, "token") as manager:
+        source = server.store.add(ROOT_CID, "source", FOLDER)["cid"]
+        sub = server.store.add(source, "..", FOLDER)["cid"]
+        escaping = server.store.add(sub, "../escaped.html", DOCUMENT, content=b"escaped")["cid"]
+        first = server.store.add(source, "dup.html", DOCUMENT, content=b"first")["cid"]
+        second = server.store.add(source, "dup.html", DOCUMENT, content=b"second")["cid"]
+
+        with CopyJournal(str(tmp_path / "download.db")) as journal:
+            report = download_tree(manager, source, str(local_dir), journal=journal, max_workers=2)
+            assert report.ok and not (tmp_path / "escaped.html").exists()
+            assert report.mapping[escaping] == f"_{sub}/.._escaped.html"
+            assert (local_dir / f"_{sub}" / ".._escaped.html").read_bytes() == b"escaped"
+            assert {report.mapping[first], report.mapping[second]} == {"dup.html", f"dup ({second}).html"}
+            assert {(local_dir / report.mapping[cid]).read_bytes() for cid in (first, second)} == {b"first",
+                                                                                                 b"second"}
+
+            server.requests.clear()
+            assert download_tree(manager, source, str(local_dir), journal=journal).mapping == report.mapping
+            assert not [path for method, path in server.requests if "/document/content/" in path]
+
+
+def test_failed_swap_keeps_previous_index(mocker):
+    with TreeIndex() as index:
+        manager = make_manager(mocker)
+        index.build(manager, "root")
+        index._connection.set_authorizer(
+            lambda action, *args: sqlite3.SQLITE_DENY if action == sqlite3.SQLITE_ALTER_TABLE else sqlite3.SQLITE_OK)
+
+        with pytest.raises(sqlite3.DatabaseError):
+            index.build(manager, "root")
+        index._connection.set_authorizer(None)
+        assert len(index) == 5 and index.get_by_path("a/b/d3.html").cid == "d3"